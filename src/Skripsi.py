@@ -1,14 +1,13 @@
 import logging
 import os
+import queue
 import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-import cv2
-import mediapipe as mp
 
 # Redirect sys.stdout and sys.stderr for environments like PyInstaller
 if not sys.stdout:
@@ -17,106 +16,50 @@ if not sys.stderr:
     sys.stderr = open(os.devnull, "w")
 
 # Konfigurasi logging
+# Level default INFO agar tidak ada I/O log DEBUG di jalur inferensi; set PRODUCT_DETECTION_LOG_LEVEL=DEBUG bila perlu
 logging.basicConfig(
     filename="debug.log",  # Log akan disimpan di file debug.log
-    level=logging.DEBUG,
+    level=os.environ.get("PRODUCT_DETECTION_LOG_LEVEL", "INFO").upper(),
     format="%(asctime)s - %(levelname)s - %(message)s",
 )
 
 logging.info("Aplikasi dimulai.")
-
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-
-    return os.path.join(base_path, relative_path)
-
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
-
-# Memuat model yang telah dilatih
-model_path = resource_path("model_mobilenet_fixed1.h5")
-logging.info(f"Path model TensorFlow: {model_path}")
-if not os.path.exists(model_path):
-    logging.error(f"Model tidak ditemukan: {model_path}")
-    sys.exit("Model tidak ditemukan. Pastikan file model tersedia.")
-
-model = tf.keras.models.load_model(model_path)
-
-# Daftar kelas produk yang sesuai dengan output model
-product_labels = ["ButterCookies", "Chitato", "Cocacola", "FrisianFlag", "KokoCrunch", "Milkita", "Neoguri", "Silverqueen", "Togo", "Top"]
-
-# MediaPipe untuk deteksi tangan
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=4, min_detection_confidence=0.5)
+app_start_time = time.perf_counter()
+
+# TensorFlow, MediaPipe, dan cv2 dimuat di thread latar belakang (lihat start_background_loading)
+import inference
+import metrics
+from worker import InferenceWorker
+from live import FrameSkipper, PredictionSmoother, RateMeter
+from camera import FrameGrabber, PreviewRenderer, PreviewStats
+from tracking import RoiTracker
+from result_store import RESULT_STORE_ENV, ResultStore
+from inference import (
+    resource_path,
+    predict_image,
+    detect_and_crop_products,
+    classify_crops,
+)
 
 # Variabel global untuk kamera dan gambar yang di-capture
-cap = None
+cap = None  # FrameGrabber yang membaca kamera di thread terpisah
+preview_job = None  # ID jadwal root.after untuk update_camera_feed
+last_frame_sequence = 0
 captured_image = None
+captured_regions = []  # Daftar (crop, box) untuk setiap tangan/produk pada gambar yang di-capture
 uploaded_image = None  # Menyimpan gambar yang di-upload di tampilan File
+detection_started = 0.0  # Waktu permintaan pengenalan terakhir dikirim, untuk latensi di riwayat hasil
 camera_index = 0  # Default kamera internal
 
-# Fungsi untuk pre-processing gambar
-def preprocess_image(image):
-    try:
-        image = image.resize((224, 224))  # Sesuaikan ukuran dengan model
-        image_array = np.array(image) / 255.0  # Normalisasi
-        return np.expand_dims(image_array, axis=0)  # Tambahkan dimensi batch
-    except Exception as e:
-        logging.error(f"Error saat pre-processing gambar: {e}", exc_info=True)
-        raise
-
-# Fungsi untuk mendeteksi tangan dan melakukan crop
-def detect_and_crop_product(image):
-    try:
-        h, w, _ = image.shape
-        section_width = w // 3  # Lebar tiap bagian (1/3 dari lebar gambar)
-
-        # Memproses setiap bagian gambar (kiri, tengah, kanan)
-        for i in range(3):
-            # Tentukan batas kiri dan kanan dari setiap bagian
-            left = i * section_width
-            right = (i + 1) * section_width if i < 2 else w  # Bagian terakhir sampai ujung kanan gambar
-            image_section = image[:, left:right]  # Ambil bagian gambar secara horizontal
-
-            # Konversi warna untuk deteksi tangan
-            rgb_image = cv2.cvtColor(image_section, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb_image)
-
-            # Jika tangan terdeteksi dalam bagian ini
-            if results.multi_hand_landmarks:
-                hand_landmarks = results.multi_hand_landmarks[0]
-                x_min, y_min = section_width, h
-                x_max, y_max = 0, 0
-
-                # Menghitung bounding box untuk area tangan di bagian ini
-                for lm in hand_landmarks.landmark:
-                    x, y = int(lm.x * section_width), int(lm.y * h)
-                    x_min = min(x_min, x)
-                    y_min = min(y_min, y)
-                    x_max = max(x_max, x)
-                    y_max = max(y_max, y)
-
-                # Menambahkan margin di sekitar tangan
-                margin = 50
-                x_min = max(0, x_min - margin)
-                y_min = max(0, y_min - margin)
-                x_max = min(section_width, x_max + margin)
-                y_max = min(h, y_max + margin)
-
-                # Crop area produk dengan memfokuskan lebih pada area yang lebih besar
-                product_area = image_section[y_min:y_max, x_min:x_max]
-                return product_area  # Mengembalikan crop pada bagian yang terdeteksi
-
-        # Jika tidak ada tangan terdeteksi di semua bagian, kembalikan gambar utuh
-        return image
-    except Exception as e:
-        logging.error(f"Error saat deteksi dan crop produk: {e}", exc_info=True)
-        raise
+# Status mode pengenalan live
+live_mode = False
+live_request = None  # Permintaan inferensi live yang sedang berjalan (maksimal satu)
+live_overlay = []  # Daftar (box, teks label) hasil live terakhir untuk digambar di preview
+inference_fps_meter = RateMeter()
+frame_skipper = FrameSkipper()
+prediction_smoothers = []  # Satu smoother per region, terurut dari kiri ke kanan
+smoother_model = None  # Model yang menghasilkan riwayat di prediction_smoothers
+roi_tracker = RoiTracker()  # Deteksi tangan penuh hanya pada keyframe; dipakai dari thread worker saja
 
 # Memastikan file logo dan background tersedia
 logo_path = resource_path("Logo.png")
@@ -131,16 +74,49 @@ if not os.path.exists(background_path):
     sys.exit("Background tidak ditemukan. Pastikan file background tersedia.")
 
 
+# === Pemuatan model di latar belakang ===
+loading_error = None
+
+def load_models_in_background():
+    global loading_error
+    try:
+        inference.load_all()
+        inference.enable_prediction_cache()
+    except Exception as e:
+        loading_error = e
+        logging.error(f"Error saat memuat model: {e}", exc_info=True)
+
+def start_background_loading():
+    threading.Thread(target=load_models_in_background, name="model-loader", daemon=True).start()
+    root.after(100, check_loading)
+
+def check_loading():
+    if loading_error is not None:
+        loading_text.set("Gagal memuat model.")
+        messagebox.showerror("Error", str(loading_error))
+        root.destroy()
+    elif inference.is_loaded():
+        loading_text.set("")
+        file_button.config(state="normal")
+        camera_button.config(state="normal")
+        logging.info(f"Model siap digunakan {time.perf_counter() - app_start_time:.3f} detik setelah aplikasi dimulai.")
+    else:
+        root.after(100, check_loading)
+
+
 # === Tampilan File ===
 def open_file_menu():
     home_frame.pack_forget()
     file_frame.pack(pady=20)
 
 def go_back_to_home():
-    global cap, captured_image
-    if cap:
-        cap.release()
+    global cap, captured_image, captured_regions
+    if live_mode:
+        set_live_mode(False)
+    inference_worker.cancel_all()  # Batalkan inferensi yang masih berjalan
+    stop_camera()
     captured_image = None  # Reset captured image saat kembali ke Home
+    captured_regions = []
     file_frame.pack_forget()
     camera_frame.pack_forget()
     home_frame.pack(pady=20)
@@ -148,6 +124,7 @@ def go_back_to_home():
     img_label.image = None
     result_text_file.set("Hasil pengenalan akan muncul di sini.")
     start_button_file.config(state="disabled")
+    detect_button_camera.config(state="normal")
 
 def upload_image():
     global uploaded_image
@@ -180,52 +157,71 @@ def validate_image(image):
         logging.error(f"Error saat validasi gambar: {e}", exc_info=True)
         return False
 
+# Fungsi inferensi yang dijalankan di thread worker (bukan di thread Tk).
+# Mengembalikan (prediksi, snapshot model) agar hasil diproses dengan label model yang sama walau model diganti.
+def predict_pil_image(image):
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    model = inference.active_model()
+    predictions = predict_image(np.asarray(image), model=model)
+    logging.debug(f"Hasil prediksi: {predictions}")
+    return predictions, model
+
+# Fungsi untuk mengirim pekerjaan ke worker; mengembalikan False bila antrian penuh
+def submit_inference(func, image, on_done, on_error, result_text):
+    try:
+        inference_worker.submit(func, image, on_done=on_done, on_error=on_error)
+        return True
+    except queue.Full:
+        logging.warning("Antrian inferensi penuh, permintaan ditolak.")
+        result_text.set("Sistem sedang sibuk, coba lagi sebentar.")
+        return False
+
 # Fungsi start_detection_file yang diperbarui
 def start_detection_file():
-    global uploaded_image
+    global uploaded_image, detection_started
+    if uploaded_image is None:
+        logging.error("Gambar tidak ditemukan.")
+        result_text_file.set("Gambar belum diunggah.")
+        return
+
+    if not validate_image(uploaded_image):
+        result_text_file.set("Gambar tidak valid atau kosong.")
+        return
+
+    detection_started = time.perf_counter()
+    if submit_inference(predict_pil_image, uploaded_image, show_detection_file, show_detection_error_file, result_text_file):
+        start_button_file.config(state="disabled")
+        result_text_file.set("Sedang mengenali produk...")
+
+def show_detection_file(result):
+    start_button_file.config(state="normal")
     try:
-        if uploaded_image is None:
-            logging.error("Gambar tidak ditemukan.")
-            result_text_file.set("Gambar belum diunggah.")
-            return
-
-        if not validate_image(uploaded_image):
-            result_text_file.set("Gambar tidak valid atau kosong.")
-            return
-
-        # Preprocess image
-        input_image = preprocess_image(uploaded_image)
-        logging.info(f"Input image shape: {input_image.shape}")
+        predictions, model = result
+        # Satu gambar berisi satu produk: label teratas bila lolos threshold, kandidat lain sebagai info
+        ranking = model.postprocessor.process_one(predictions)
+        result_store.add("file", ranking, latency=time.perf_counter() - detection_started)
 
-        # Model prediction
-        predictions = model.predict(input_image, verbose=0)[0]
-        logging.info(f"Hasil prediksi: {predictions}")
+        if inference.prediction_cache is not None:
+            logging.debug(f"Statistik cache prediksi: {inference.prediction_cache.stats()}")
 
-        # Process predictions
-        detected_products = []
-        confidence_threshold = 0.1  # Threshold keyakinan
-        for index, confidence in enumerate(predictions):
-            if confidence >= confidence_threshold:
-                product_name = product_labels[index]
-                detected_products.append((product_name, confidence))
-
-        detected_products.sort(key=lambda x: x[1], reverse=True)
-
-        if detected_products:
-            detected_product_text = "\n".join(
-                [f"{name} ({conf * 100:.2f}%)" for name, conf in detected_products]
-            )
+        candidates = ", ".join(f"{name} ({conf * 100:.2f}%)" for name, conf in ranking.top_k[1:])
+        if ranking.known:
             result_text_file.set(
-                f"Produk Terdeteksi:\n{detected_product_text}\nJumlah Produk: {len(detected_products)}"
+                f"Produk Terdeteksi:\n{ranking.label} ({ranking.confidence * 100:.2f}%)\nKemungkinan lain: {candidates}"
             )
-            logging.info(f"Produk terdeteksi: {detected_products}")
+            logging.info(f"Produk terdeteksi: {ranking.top_k}")
         else:
-            result_text_file.set("Tidak ada produk terdeteksi.")
-            logging.warning("Tidak ada produk yang terdeteksi.")
+            result_text_file.set(f"{ranking.label}.\nKandidat teratas: {ranking.top_k[0][0]} ({ranking.confidence * 100:.2f}%)")
+            logging.warning(f"Produk tidak dikenal, kandidat: {ranking.top_k}")
 
     except Exception as e:
-        logging.error(f"Error saat deteksi produk: {e}", exc_info=True)
-        result_text_file.set("Terjadi kesalahan saat deteksi produk.")
+        show_detection_error_file(e)
+
+def show_detection_error_file(error):
+    logging.error(f"Error saat deteksi produk: {error}", exc_info=error)
+    start_button_file.config(state="normal")
+    result_text_file.set("Terjadi kesalahan saat deteksi produk.")
 
 
 # === Tampilan Camera ===
@@ -234,105 +230,264 @@ def open_camera_menu():
     camera_frame.pack(pady=20)
     restart_camera()
 
+def stop_camera():
+    global cap, preview_job
+    if preview_job is not None:
+        camera_frame.after_cancel(preview_job)
+        preview_job = None
+    if cap is not None:
+        cap.release()  # Pastikan kamera tidak tetap menyala
+        cap = None
+
 def restart_camera():
-    global cap, captured_image, camera_index
+    global cap, captured_image, captured_regions, camera_index, last_frame_sequence
+    inference_worker.cancel_all()  # Abaikan hasil crop/pengenalan dari capture sebelumnya
     captured_image = None  # Reset captured image setiap kali kamera di-restart
+    captured_regions = []
     result_text_camera.set("Hasil pengenalan akan muncul di sini.")
-    if cap is not None:
-        cap.release()  # Pastikan kamera tidak tetap menyala
-    cap = cv2.VideoCapture(camera_index)  # Menggunakan kamera berdasarkan pilihan user
+    stop_camera()
+    cap = FrameGrabber(camera_index)  # Menggunakan kamera berdasarkan pilihan user
+    last_frame_sequence = 0
+    preview_stats.reset()
     update_camera_feed()
     # Menampilkan tombol yang tepat saat memasuki tampilan kamera
+    if live_mode:
+        set_live_mode(False)
     capture_button.pack(pady=10)
+    live_button.pack(pady=5, after=capture_button)
+    detect_button_camera.config(state="normal")
     detect_button_camera.pack_forget()  # Sembunyikan tombol deteksi
     recapture_button.pack_forget()  # Sembunyikan tombol recapture
 
+def update_stats_text():
+    text = (
+        f"Kamera: {cap.fps:.1f} fps | Preview: {preview_renderer.fps_meter.rate:.1f} fps | "
+        f"CPU preview: {preview_stats.cpu_percent:.0f}% + grabber {preview_stats.grabber_cpu_percent:.0f}% | "
+        f"Frame terlewat: {cap.dropped}"
+    )
+    if live_mode:
+        text += (
+            f"\nInferensi: {inference_fps_meter.rate:.1f} fps | Setiap {frame_skipper.interval} frame | "
+            f"Keyframe: {roi_tracker.keyframes}, dilacak: {roi_tracker.tracked_frames}"
+        )
+    fps_text_camera.set(text)
+
+# Preview memeriksa frame baru beberapa kali per periode frame kamera; render hanya saat ada frame baru
+PREVIEW_POLLS_PER_FRAME = 2
+
 def update_camera_feed():
-    if cap is not None and cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame)
-            imgtk = ImageTk.PhotoImage(image=img)
-            camera_label.imgtk = imgtk
-            camera_label.config(image=imgtk)
-        camera_frame.after(10, update_camera_feed)
+    global preview_job, last_frame_sequence
+    preview_job = None
+    if cap is None or not cap.isOpened():
+        return
+    tick_started = time.perf_counter()
+    sequence, frame = cap.latest()
+    # Hanya render bila ada frame baru dari grabber
+    if frame is not None and sequence != last_frame_sequence:
+        last_frame_sequence = sequence
+        if live_mode:
+            submit_live_frame(frame)
+        with metrics.timer("gui_render"):
+            preview_renderer.render(frame, live_overlay if live_mode else (), draw=draw_regions)
+    if preview_stats.update(cap):
+        update_stats_text()
+    # Jadwal berbasis tenggat terhadap fps kamera sebenarnya: waktu render dan submit dikurangkan
+    # dari periode polling, sehingga preview tidak tertinggal dari kamera
+    period_ms = 1000 / cap.fps / PREVIEW_POLLS_PER_FRAME
+    elapsed_ms = (time.perf_counter() - tick_started) * 1000
+    preview_job = camera_frame.after(max(1, int(period_ms - elapsed_ms)), update_camera_feed)
+
+# Fungsi untuk menggambar bounding box dan label setiap produk pada frame BGR (in-place)
+def draw_regions(frame, regions):
+    import cv2
+
+    for box, text in regions:
+        x_min, y_min, x_max, y_max = box
+        cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), (181, 173, 0), 2)
+        if text:
+            cv2.putText(frame, text, (x_min + 4, max(y_min - 8, 16)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (181, 173, 0), 2)
+    return frame
+
+# Fungsi untuk mengklasifikasi semua region (crop, box) dalam satu batch; dijalankan di worker.
+# Mengembalikan (prediksi, snapshot model) seperti predict_pil_image.
+def classify_regions(regions):
+    model = inference.active_model()
+    return classify_crops([crop for crop, _ in regions], model), model
+
+# === Mode Live ===
+# Fungsi inferensi live (di thread worker): crop setiap tangan yang dilacak lalu klasifikasi dalam satu batch
+def predict_live_frame(frame):
+    start = time.perf_counter()
+    regions = roi_tracker.regions(frame)
+    predictions, model = classify_regions(regions)
+    # Confidence turun (mis. box tergeser dari produk): deteksi ulang di frame berikutnya
+    roi_tracker.report_confidence(model.postprocessor.top_k(predictions, k=1)[1][:, 0])
+    return [box for _, box in regions], predictions, time.perf_counter() - start, model
+
+def submit_live_frame(frame):
+    global live_request
+    # Frame dibuang bila inferensi sebelumnya belum selesai, sehingga yang diproses selalu frame terbaru.
+    # Skipper tetap dipanggil untuk setiap frame agar hitungannya tidak berhenti selama inferensi berjalan.
+    if not frame_skipper.should_process(busy=live_request is not None):
+        return
+    try:
+        live_request = inference_worker.submit(
+            predict_live_frame, frame, on_done=show_live_result, on_error=show_live_error
+        )
+    except queue.Full:
+        live_request = None
+
+def show_live_result(result):
+    global live_request, live_overlay, prediction_smoothers, smoother_model
+    live_request = None
+    boxes, predictions, inference_seconds, model = result
+    postprocessor = model.postprocessor
+    inference_fps_meter.tick()
+    frame_skipper.update(inference_seconds, cap.fps if cap is not None else 0.0)
+
+    # Jumlah region atau model berubah: riwayat smoothing tidak lagi sesuai dengan region/label yang sama
+    if len(prediction_smoothers) != len(boxes) or smoother_model is not model:
+        prediction_smoothers = [PredictionSmoother() for _ in boxes]
+        smoother_model = model
+
+    overlay = []
+    lines = []
+    result_store.add_many("live", postprocessor.process(predictions), boxes, latency=inference_seconds)
+
+    # Kalibrasi seluruh region sekaligus, lalu threshold per kelas pada hasil smoothing
+    calibrated = postprocessor.calibrate(predictions)
+    for number, (box, row, smoother) in enumerate(zip(boxes, calibrated, prediction_smoothers), start=1):
+        label_index, confidence = smoother.update(row)
+        if postprocessor.accepts(label_index, confidence):
+            text = f"{postprocessor.labels[label_index]} ({confidence * 100:.2f}%)"
+            lines.append(f"{number}. {text}" if len(boxes) > 1 else text)
+            overlay.append((box, text))
+        else:
+            overlay.append((box, ""))
+    live_overlay = overlay
+
+    if lines:
+        result_text_camera.set("Produk Terdeteksi:\n" + "\n".join(lines))
+    else:
+        result_text_camera.set("Tidak ada produk terdeteksi.")
+
+def show_live_error(error):
+    global live_request
+    live_request = None
+    logging.error(f"Error saat pengenalan live: {error}", exc_info=error)
+
+def set_live_mode(enabled):
+    global live_mode, live_request, live_overlay, prediction_smoothers, smoother_model
+    live_mode = enabled
+    live_overlay = []
+    prediction_smoothers = []
+    smoother_model = None
+    roi_tracker.reset()
+    if live_request is not None:
+        live_request.cancel()
+        live_request = None
+    inference_fps_meter.reset()
+    frame_skipper.reset()
+    live_button.config(text="Stop Live" if enabled else "Mode Live")
+    if enabled:
+        capture_button.pack_forget()
+        result_text_camera.set("Mengenali produk secara live...")
+    else:
+        capture_button.pack(pady=10, before=live_button)
+        result_text_camera.set("Hasil pengenalan akan muncul di sini.")
+
+def toggle_live_mode():
+    set_live_mode(not live_mode)
 
 def capture_image():
     global captured_image
     if cap is not None and cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            # Ambil dan crop gambar
-            captured_image = detect_and_crop_product(frame)
-            display_captured_image()  # Tampilkan hasil crop
-            cap.release()  # Tutup kamera setelah mengambil gambar
-            capture_button.pack_forget()  # Sembunyikan tombol capture
-            detect_button_camera.pack(pady=10)  # Tampilkan tombol untuk memulai pengenalan
+        _, frame = cap.latest()
+        if frame is not None:
+            stop_camera()  # Tutup kamera setelah mengambil gambar
+            live_button.pack_forget()
+            captured_image = frame
+            # Crop setiap tangan di worker agar antarmuka tidak membeku
+            if submit_inference(detect_and_crop_products, frame, show_captured_regions, show_detection_error_camera, result_text_camera):
+                capture_button.pack_forget()  # Sembunyikan tombol capture
+                result_text_camera.set("Sedang mendeteksi tangan...")
+            else:
+                recapture_button.pack(pady=10)
         else:
             print("Gagal mengambil gambar dari kamera.")
 
-def display_captured_image():
+def show_captured_regions(regions):
+    global captured_regions
+    captured_regions = regions
+    display_captured_image([(box, "") for _, box in regions])  # Tampilkan area setiap produk
+    result_text_camera.set(f"{len(regions)} area produk ditemukan. Klik Mulai Pengenalan untuk mengenali produk.")
+    detect_button_camera.pack(pady=10)  # Tampilkan tombol untuk memulai pengenalan
+
+def display_captured_image(overlay=()):
     if captured_image is not None:
-        cropped_rgb = cv2.cvtColor(captured_image, cv2.COLOR_BGR2RGB)  # Konversi ke RGB
-        img = Image.fromarray(cropped_rgb)  # Buat image dari array
-        imgtk = ImageTk.PhotoImage(image=img)  # Konversi ke PhotoImage
-        camera_label.config(image=imgtk)  # Tampilkan di label
-        camera_label.image = imgtk  # Simpan referensi ke image
+        preview_renderer.render(captured_image, overlay, draw=draw_regions)
     else:
         print("Gambar tidak ditemukan untuk ditampilkan.")
 
 # Fungsi start_detection_on_captured_image yang diperbarui
 def start_detection_on_captured_image():
-    global captured_image
+    global captured_image, detection_started
+    if captured_image is None or not captured_regions:
+        logging.error("Gambar belum di-capture.")
+        result_text_camera.set("Gambar belum di-capture.")
+        return
+
+    if not all(validate_image(crop) for crop, _ in captured_regions):
+        result_text_camera.set("Gambar tidak valid atau kosong.")
+        return
+
+    detection_started = time.perf_counter()
+    if submit_inference(classify_regions, captured_regions, show_detection_camera, show_detection_error_camera, result_text_camera):
+        detect_button_camera.config(state="disabled")
+        result_text_camera.set("Sedang mengenali produk...")
+
+def show_detection_camera(result):
+    detect_button_camera.config(state="normal")
     try:
-        if captured_image is None:
-            logging.error("Gambar belum di-capture.")
-            result_text_camera.set("Gambar belum di-capture.")
-            return
-
-        if not validate_image(captured_image):
-            result_text_camera.set("Gambar tidak valid atau kosong.")
-            return
-
-        # Convert captured_image to PIL Image for preprocessing
-        captured_pil = Image.fromarray(cv2.cvtColor(captured_image, cv2.COLOR_BGR2RGB))
-        logging.info("Gambar berhasil di-capture untuk deteksi.")
-
-        # Preprocess image
-        input_image = preprocess_image(captured_pil)
-        logging.info(f"Input image shape: {input_image.shape}")
-
-        # Model prediction
-        predictions = model.predict(input_image, verbose=0)[0]
-        logging.info(f"Hasil prediksi: {predictions}")
-
-        # Process predictions
+        predictions, model = result
+        # Process predictions: produk teratas untuk setiap region
         detected_products = []
-        confidence_threshold = 0.1  # Threshold keyakinan
-        for index, confidence in enumerate(predictions):
-            if confidence >= confidence_threshold:
-                product_name = product_labels[index]
-                detected_products.append((product_name, confidence))
-
-        detected_products.sort(key=lambda x: x[1], reverse=True)
+        overlay = []
+        rankings = model.postprocessor.process(predictions)
+        result_store.add_many(
+            "camera", rankings, [box for _, box in captured_regions], latency=time.perf_counter() - detection_started
+        )
+        for (_, box), ranking in zip(captured_regions, rankings):
+            if ranking.known:
+                detected_products.append((ranking.label, ranking.confidence, box))
+                overlay.append((box, f"{ranking.label} ({ranking.confidence * 100:.2f}%)"))
+            else:
+                overlay.append((box, ""))
+        display_captured_image(overlay)
 
         if detected_products:
-            top_product = detected_products[0]
-            detected_product_text = f"{top_product[0]} ({top_product[1] * 100:.2f}%)"
-            result_text_camera.set(f"Produk Terdeteksi:\n{detected_product_text}")
+            detected_product_text = "\n".join(
+                [f"{number}. {name} ({conf * 100:.2f}%)" for number, (name, conf, _) in enumerate(detected_products, start=1)]
+            )
+            result_text_camera.set(
+                f"Produk Terdeteksi:\n{detected_product_text}\nJumlah Produk: {len(detected_products)}"
+            )
             logging.info(f"Produk terdeteksi: {detected_products}")
         else:
             result_text_camera.set("Tidak ada produk terdeteksi.")
             logging.warning("Tidak ada produk yang terdeteksi.")
 
     except Exception as e:
-        logging.error(f"Error saat deteksi produk: {e}", exc_info=True)
-        result_text_camera.set("Terjadi kesalahan saat deteksi produk.")
+        show_detection_error_camera(e)
 
-        # Sembunyikan tombol "Mulai Pengenalan" dan tampilkan tombol "Camera"
-        detect_button_camera.pack_forget()
-        recapture_button.pack(pady=10)
+def show_detection_error_camera(error):
+    logging.error(f"Error saat deteksi produk: {error}", exc_info=error)
+    detect_button_camera.config(state="normal")
+    result_text_camera.set("Terjadi kesalahan saat deteksi produk.")
+
+    # Sembunyikan tombol "Mulai Pengenalan" dan tampilkan tombol "Camera"
+    detect_button_camera.pack_forget()
+    recapture_button.pack(pady=10)
 
 
 # About button callback
@@ -378,8 +533,9 @@ def help_app():
     1. Klik tombol "Camera" di menu utama.
     2. Kamera akan menyala dan menampilkan feed langsung.
     3. Klik "Capture" untuk mengambil gambar dari kamera.
-    4. Klik "Mulai Pengenalan" untuk mendeteksi produk dalam gambar yang diambil.
+    4. Klik "Mulai Pengenalan" untuk mendeteksi produk dalam gambar yang diambil. Setiap produk yang dipegang akan dikenali dan ditandai dengan kotak.
     5. Jika ingin mencoba ulang, klik tombol "Camera" untuk restart kamera.
+    6. Klik "Mode Live" untuk mengenali produk secara terus-menerus dari kamera; klik "Stop Live" untuk berhenti.
 
     **Informasi Tambahan**:
     - Pastikan gambar atau kamera memiliki pencahayaan yang baik untuk hasil terbaik.
@@ -395,6 +551,9 @@ root.title("Product Detection App")
 root.geometry("800x600")
 root.configure(bg="#2b2b2b")  # Background color
 
+# Worker inferensi agar model.predict dan deteksi tangan tidak memblokir GUI
+inference_worker = InferenceWorker(root)
+
 bg_image_path = resource_path("background.jpg")
 logging.info(f"Path background image: {bg_image_path}")
 bg_image = Image.open(resource_path("background.jpg"))
@@ -424,10 +583,10 @@ font_style = ("Georgia", 12, "bold")
 home_frame = tk.Frame(root, bg="white", highlightthickness=0)
 home_frame.pack(pady=20)
 
-file_button = tk.Button(home_frame, text="File", font=font_style, command=open_file_menu, width=15, height=2, bg="#00ADB5", fg="white", activebackground="#FF5722", highlightthickness=0)
+file_button = tk.Button(home_frame, text="File", font=font_style, command=open_file_menu, state="disabled", width=15, height=2, bg="#00ADB5", fg="white", activebackground="#FF5722", highlightthickness=0)
 file_button.pack(pady=5)
 
-camera_button = tk.Button(home_frame, text="Camera", font=font_style, command=open_camera_menu, width=15, height=2, bg="#00ADB5", fg="white", activebackground="#FF5722", highlightthickness=0)
+camera_button = tk.Button(home_frame, text="Camera", font=font_style, command=open_camera_menu, state="disabled", width=15, height=2, bg="#00ADB5", fg="white", activebackground="#FF5722", highlightthickness=0)
 camera_button.pack(pady=5)
 
 button_frame = tk.Frame(root, bg="white")
@@ -470,6 +629,11 @@ camera_dropdown = tk.OptionMenu(home_frame, selected_camera, *camera_options, co
 camera_dropdown.config(width=20, font=("Helvetica", 10), bg=primary_color, fg="white", activebackground=secondary_color)
 camera_dropdown.pack(pady=10)
 
+# Status pemuatan model, dikosongkan setelah model dan detektor tangan siap
+loading_text = tk.StringVar(value="Memuat model, mohon tunggu...")
+loading_label = tk.Label(home_frame, textvariable=loading_text, font=("Helvetica", 10), fg="#2b2b2b", bg="white")
+loading_label.pack(pady=5)
+
 # Frame untuk tampilan File
 file_frame = tk.Frame(root, bg="white")
 back_button_file = tk.Button(file_frame, text="Back to Home", font=font_style, command=go_back_to_home, bg=primary_color, fg="white", activebackground=secondary_color)
@@ -497,9 +661,16 @@ camera_back_button.pack(pady=5)
 camera_label = tk.Label(camera_frame, bg="#1c1c1c", width=400, height=300)  # Adjusted to a smaller size
 camera_label.pack(pady=10)
 
+# Preview diperkecil ke ukuran label; buffer dan PhotoImage dipakai ulang antar frame
+preview_renderer = PreviewRenderer(camera_label, 400, 300)
+preview_stats = PreviewStats(preview_renderer)
+
 capture_button = tk.Button(camera_frame, text="Capture", font=font_style, command=capture_image, bg=secondary_color, fg="white", activebackground=primary_color)
 capture_button.pack(pady=10)
 
+live_button = tk.Button(camera_frame, text="Mode Live", font=font_style, command=toggle_live_mode, bg=primary_color, fg="white", activebackground=secondary_color)
+live_button.pack(pady=5)
+
 detect_button_camera = tk.Button(camera_frame, text="Mulai Pengenalan", font=font_style, command=start_detection_on_captured_image, bg="#3c3c3c", fg="white", activebackground=primary_color)
 detect_button_camera.pack_forget()
 
@@ -511,4 +682,19 @@ result_text_camera.set("Hasil pengenalan akan muncul di sini.")
 result_label_camera = tk.Label(camera_frame, textvariable=result_text_camera, font=font_style, wraplength=500, justify="left", fg="white", bg="#2b2b2b")
 result_label_camera.pack(pady=10)
 
+fps_text_camera = tk.StringVar()
+fps_label_camera = tk.Label(camera_frame, textvariable=fps_text_camera, font=("Helvetica", 10), fg="white", bg="#2b2b2b")
+fps_label_camera.pack(pady=5)
+
+root.update_idletasks()
+logging.info(f"GUI tampil {time.perf_counter() - app_start_time:.3f} detik setelah aplikasi dimulai.")
+start_background_loading()
+
+# Ekspor metrik latensi per tahap setiap menit; buat file "profile.trigger" untuk memicu profiling
+metrics_exporter = metrics.start_exporter(jsonl_path="metrics.jsonl", prometheus_path="metrics.prom")
+# Riwayat hasil pengenalan; query dengan: python src/result_store.py hasil_pengenalan.db counts
+result_store = ResultStore(os.environ.get(RESULT_STORE_ENV) or "hasil_pengenalan.db")
+
 root.mainloop()
+metrics_exporter.stop()
+result_store.close()
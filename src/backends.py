@@ -0,0 +1,161 @@
+"""Backend inferensi yang dapat dipilih saat runtime.
+
+Semua backend menerima batch float32 (N, 224, 224, 3) yang sudah dinormalisasi
+ke [0, 1] (atau piksel 0..255 bila normalize_in_graph aktif, khusus keras) dan
+mengembalikan probabilitas kelas (N, jumlah_kelas).
+
+Pemilihan backend:
+- keras:      model .h5 asli melalui tf.keras (default)
+- savedmodel: folder SavedModel hasil export_model.py
+- tflite:     file .tflite (float32/float16/int8) melalui tflite_runtime atau tf.lite
+"""
+import importlib
+import logging
+import os
+
+import numpy as np
+
+BACKEND_NAMES = ("keras", "savedmodel", "tflite")
+
+# Variabel lingkungan untuk memilih backend tanpa mengubah kode
+BACKEND_ENV = "PRODUCT_DETECTION_BACKEND"
+MODEL_ENV = "PRODUCT_DETECTION_MODEL"
+NORMALIZE_IN_GRAPH_ENV = "PRODUCT_DETECTION_NORMALIZE_IN_GRAPH"
+THREADS_ENV = "PRODUCT_DETECTION_THREADS"
+XLA_ENV = "PRODUCT_DETECTION_XLA"
+MANIFEST_ENV = "PRODUCT_DETECTION_MANIFEST"
+
+# Fungsi untuk meng-import runtime yang dibutuhkan backend (dipisah agar waktunya bisa diukur)
+def import_runtime(name):
+    if name == "tflite":
+        try:
+            return importlib.import_module("tflite_runtime.interpreter")
+        except ImportError:
+            return importlib.import_module("tensorflow")
+    return importlib.import_module("tensorflow")
+
+# Fungsi untuk membatasi thread TensorFlow; harus dipanggil sebelum operasi TF pertama dijalankan
+def configure_tf_threads(intra_op, inter_op=1):
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model_path, normalize_in_graph=False, jit_compile=False):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path)
+        if normalize_in_graph:
+            # Tambahkan layer Rescaling agar input cukup berupa piksel 0..255 (float32)
+            inputs = tf.keras.Input(shape=self.model.input_shape[1:])
+            outputs = self.model(tf.keras.layers.Rescaling(1.0 / 255.0)(inputs))
+            self.model = tf.keras.Model(inputs, outputs)
+        # tf.function dengan signature tetap (batch dinamis) menggantikan model.predict, yang membangun
+        # fungsi prediksi sendiri pada pemanggilan pertama dan menambah overhead per pemanggilan.
+        # Dengan XLA, setiap ukuran batch baru dikompilasi sekali; lakukan warm-up di ukuran yang dipakai.
+        model = self.model
+        self._predict_fn = tf.function(
+            lambda batch: model(batch, training=False),
+            input_signature=[tf.TensorSpec([None, *model.input_shape[1:]], tf.float32)],
+            jit_compile=jit_compile,
+        )
+
+    def predict(self, batch):
+        return self._predict_fn(batch).numpy()
+
+class SavedModelBackend:
+    name = "savedmodel"
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self._tf = tf
+        loaded = tf.saved_model.load(model_path)
+        self._loaded = loaded  # Simpan referensi agar variabel tidak di-garbage collect
+        self._fn = loaded.signatures["serving_default"]
+        self._input_name = list(self._fn.structured_input_signature[1].keys())[0]
+
+    def predict(self, batch):
+        outputs = self._fn(**{self._input_name: self._tf.constant(batch, dtype=self._tf.float32)})
+        return next(iter(outputs.values())).numpy()
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+
+    def _resize(self, batch_size):
+        # Interpreter TFLite memiliki ukuran batch tetap; ubah ukuran tensor bila berbeda
+        if batch_size != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input["index"], [batch_size, *self._input["shape"][1:]])
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def predict(self, batch):
+        self._resize(len(batch))
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            data = batch.astype(np.float32, copy=False)
+        else:
+            # Model int8: kuantisasi input sesuai scale/zero_point model
+            scale, zero_point = self._input["quantization"]
+            info = np.iinfo(dtype)
+            data = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+        self.interpreter.set_tensor(self._input["index"], data)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output["index"])
+        if self._output["dtype"] != np.float32:
+            scale, zero_point = self._output["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+BACKEND_CLASSES = {
+    "keras": KerasBackend,
+    "savedmodel": SavedModelBackend,
+    "tflite": TFLiteBackend,
+}
+
+# Fungsi untuk menebak backend dari path model
+def guess_backend(model_path):
+    if model_path.endswith(".tflite"):
+        return "tflite"
+    if os.path.isdir(model_path):
+        return "savedmodel"
+    return "keras"
+
+# Fungsi untuk membuat backend sesuai nama (atau dari path model bila nama tidak diberikan).
+# num_threads membatasi thread intra-op (TF) atau thread interpreter (TFLite); jit_compile hanya untuk keras.
+def create_backend(model_path, name=None, normalize_in_graph=False, num_threads=None, jit_compile=False):
+    name = name or guess_backend(model_path)
+    if name not in BACKEND_CLASSES:
+        raise ValueError(f"Backend tidak dikenal: {name} (pilihan: {', '.join(BACKEND_NAMES)})")
+    logging.info(f"Memuat backend {name} dari {model_path}")
+    if normalize_in_graph and name != "keras":
+        raise ValueError("Normalisasi di dalam graph hanya didukung backend keras")
+    if name == "tflite":
+        return TFLiteBackend(model_path, num_threads=num_threads)
+    if num_threads:
+        configure_tf_threads(num_threads)
+    if name == "keras":
+        return KerasBackend(model_path, normalize_in_graph, jit_compile)
+    return BACKEND_CLASSES[name](model_path)
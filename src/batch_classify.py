@@ -0,0 +1,211 @@
+"""Klasifikasi produk secara batch tanpa GUI.
+
+Contoh:
+    python src/batch_classify.py foto_rak/ --output hasil.csv --batch-size 32
+    python src/batch_classify.py @daftar_file.txt --output hasil.jsonl
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Fungsi untuk mengumpulkan path gambar dari folder, file, atau daftar file (@list.txt)
+def iter_image_paths(inputs, recursive=False):
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:], encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield line
+        elif os.path.isdir(item):
+            if recursive:
+                for dirpath, _, filenames in os.walk(item):
+                    for name in sorted(filenames):
+                        if name.lower().endswith(IMAGE_EXTENSIONS):
+                            yield os.path.join(dirpath, name)
+            else:
+                for name in sorted(os.listdir(item)):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(item, name)
+        else:
+            yield item
+
+# Fungsi untuk decode dan resize satu gambar (dijalankan di worker pool)
+def load_and_resize(path, cache=None):
+    from preprocessing import INPUT_SIZE, resize_to_input
+
+    try:
+        with Image.open(path) as image:
+            # Decoder JPEG dapat langsung memperkecil gambar saat decode (1/2, 1/4, 1/8)
+            image.draft("RGB", INPUT_SIZE)
+            decoded = np.asarray(image.convert("RGB"))
+            key = cache.key(decoded, "batch") if cache is not None else None
+            return path, resize_to_input(decoded), key, None
+    except Exception as e:
+        logging.error(f"Gagal memuat gambar {path}: {e}")
+        return path, None, None, str(e)
+
+# Fungsi untuk membaca gambar secara paralel dan mengelompokkannya menjadi batch
+def iter_batches(paths, batch_size, workers, cache=None):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        paths = iter(paths)
+        batch = []
+        # Batasi jumlah pekerjaan yang sedang berjalan agar memori tetap terkendali
+        max_pending = batch_size * 2
+        while True:
+            while len(pending) < max_pending:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending.append(executor.submit(load_and_resize, path, cache))
+            if not pending:
+                break
+            batch.append(pending.popleft().result())
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+class CsvResultWriter:
+    def __init__(self, file, top_k):
+        self.writer = csv.writer(file)
+        header = ["path", "label", "confidence"]
+        for k in range(1, top_k + 1):
+            header += [f"label_{k}", f"confidence_{k}"]
+        self.writer.writerow(header + ["error"])
+
+    def write(self, record):
+        row = [record["path"], record["label"], record["confidence"]]
+        for name, conf in record["top_k"]:
+            row += [name, conf]
+        self.writer.writerow(row + [record["error"] or ""])
+
+class JsonlResultWriter:
+    def __init__(self, file, top_k):
+        self.file = file
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+# Fungsi untuk mengubah hasil post-processing satu gambar menjadi record hasil
+def make_record(path, ranking):
+    return {
+        "path": path,
+        "label": ranking.label,
+        "confidence": round(ranking.confidence, 6),
+        "known": ranking.known,
+        "top_k": [(name, round(conf, 6)) for name, conf in ranking.top_k],
+        "error": None,
+    }
+
+def run(paths, output, output_format, batch_size, workers, top_k, cache=None, store=None):
+    from inference import active_model, make_input_buffer, predict_batch
+
+    writer_class = CsvResultWriter if output_format == "csv" else JsonlResultWriter
+    total = 0
+    failed = 0
+    start = time.perf_counter()
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = writer_class(f, top_k)
+        # Tensor input batch dialokasikan sekali dan dipakai ulang untuk semua batch
+        input_buffer = make_input_buffer(batch_size)
+        # Satu snapshot model untuk seluruh proses agar label dan post-processing tetap sesuai
+        model = active_model()
+        postprocessor = model.postprocessor
+        for batch in iter_batches(paths, batch_size, workers, cache):
+            valid = []
+            for path, array, key, _ in batch:
+                if array is None:
+                    continue
+                cached = cache.get(key, model.fingerprint) if cache is not None else None
+                if cached is not None:
+                    ranking = postprocessor.process_one(cached, top_k)
+                    writer.write(make_record(path, ranking))
+                    if store is not None:
+                        store.add("batch", ranking)
+                else:
+                    valid.append((path, array, key))
+            if valid:
+                predictions = predict_batch(input_buffer.from_images([array for _, array, _ in valid]), model)
+                for (path, _, key), row, ranking in zip(valid, predictions, postprocessor.process(predictions, top_k)):
+                    if cache is not None:
+                        cache.put(key, row, model.fingerprint)
+                    writer.write(make_record(path, ranking))
+                    if store is not None:
+                        store.add("batch", ranking)
+            for path, array, _, error in batch:
+                if array is None:
+                    writer.write({"path": path, "label": None, "confidence": None, "known": False, "top_k": [], "error": error})
+                    failed += 1
+            total += len(batch)
+            f.flush()
+            logging.info(f"Batch selesai: {len(batch)} gambar (total {total})")
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    logging.info(f"Klasifikasi batch selesai: {total} gambar, {failed} gagal, {elapsed:.2f} detik ({rate:.1f} gambar/detik)")
+    return total, failed, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi produk secara batch tanpa GUI.")
+    parser.add_argument("inputs", nargs="+", help="Folder, file gambar, atau @file berisi daftar path gambar")
+    parser.add_argument("--output", "-o", required=True, help="File hasil (.csv atau .jsonl)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Format hasil (default: dari ekstensi file output)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Jumlah gambar per pemanggilan model.predict")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Jumlah thread untuk decode dan pre-processing")
+    parser.add_argument("--top-k", type=int, default=3, help="Jumlah label teratas yang disimpan per gambar")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Telusuri subfolder")
+    parser.add_argument("--backend", choices=["keras", "savedmodel", "tflite"], help="Backend inferensi (default: dari ekstensi model)")
+    parser.add_argument("--model", help="Path model (.h5, folder SavedModel, atau .tflite)")
+    parser.add_argument("--cache", help="File SQLite untuk cache prediksi di disk (gambar yang sama tidak diprediksi ulang)")
+    parser.add_argument("--cache-max-mb", type=int, default=256, help="Ukuran maksimum cache disk dalam MB")
+    parser.add_argument("--store", help="File SQLite untuk riwayat hasil pengenalan (lihat result_store.py)")
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        parser.error("--batch-size harus >= 1")
+    output_format = args.format or ("jsonl" if args.output.lower().endswith(".jsonl") else "csv")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+
+    import inference
+
+    inference.configure_backend(args.backend, args.model)
+    cache = None
+    if args.cache:
+        cache = inference.enable_prediction_cache(disk_path=args.cache, disk_max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    store = None
+    if args.store:
+        from result_store import ResultStore
+
+        store = ResultStore(args.store)
+
+    paths = iter_image_paths(args.inputs, recursive=args.recursive)
+    total, failed, elapsed = run(paths, args.output, output_format, args.batch_size, args.workers, args.top_k, cache, store)
+    if store is not None:
+        store.close()
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{total} gambar diproses ({failed} gagal) dalam {elapsed:.2f} detik, {rate:.1f} gambar/detik")
+    if cache is not None:
+        print(f"Cache prediksi: {cache.stats()}")
+        cache.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
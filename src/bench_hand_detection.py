@@ -0,0 +1,91 @@
+"""Benchmark deteksi tangan: tiga pemanggilan MediaPipe per frame (lama) vs satu pemanggilan.
+
+Contoh:
+    python src/bench_hand_detection.py --images sampel/ --repeats 5
+    python src/bench_hand_detection.py --synthetic 20 --size 1280x720
+"""
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+import inference
+from batch_classify import iter_image_paths
+
+# Implementasi lama: frame dibagi tiga bagian vertikal, masing-masing dikonversi dan diproses MediaPipe
+def legacy_detect_and_crop_product(image):
+    import cv2
+
+    hands = inference.get_hands()
+    h, w, _ = image.shape
+    section_width = w // 3
+    for i in range(3):
+        left = i * section_width
+        right = (i + 1) * section_width if i < 2 else w
+        image_section = image[:, left:right]
+        rgb_image = cv2.cvtColor(image_section, cv2.COLOR_BGR2RGB)
+        results = hands.process(rgb_image)
+        if results.multi_hand_landmarks:
+            hand_landmarks = results.multi_hand_landmarks[0]
+            x_min, y_min = section_width, h
+            x_max, y_max = 0, 0
+            for lm in hand_landmarks.landmark:
+                x, y = int(lm.x * section_width), int(lm.y * h)
+                x_min = min(x_min, x)
+                y_min = min(y_min, y)
+                x_max = max(x_max, x)
+                y_max = max(y_max, y)
+            margin = 50
+            x_min = max(0, x_min - margin)
+            y_min = max(0, y_min - margin)
+            x_max = min(section_width, x_max + margin)
+            y_max = min(h, y_max + margin)
+            return image_section[y_min:y_max, x_min:x_max]
+    return image
+
+def load_frames(args):
+    import cv2
+
+    if args.images:
+        frames = [cv2.imread(path) for path in iter_image_paths([args.images], recursive=True)]
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            raise ValueError(f"Tidak ada gambar yang bisa dibaca di {args.images}")
+        return frames
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(args.synthetic)]
+
+def time_per_frame(func, frames, repeats):
+    func(frames[0])  # Pemanasan
+    timings = []
+    for _ in range(repeats):
+        for frame in frames:
+            start = time.perf_counter()
+            func(frame)
+            timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan biaya deteksi tangan per frame sebelum dan sesudah optimasi.")
+    parser.add_argument("--images", help="Folder gambar uji (default: frame sintetis)")
+    parser.add_argument("--synthetic", type=int, default=20, help="Jumlah frame sintetis bila --images tidak diberikan")
+    parser.add_argument("--size", default="1280x720", help="Ukuran frame sintetis, LEBARxTINGGI")
+    parser.add_argument("--repeats", type=int, default=3, help="Berapa kali setiap frame diproses")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    frames = load_frames(args)
+    for name, func in (("tiga bagian (lama)", legacy_detect_and_crop_product), ("satu pemanggilan", inference.detect_and_crop_product)):
+        timings = time_per_frame(func, frames, args.repeats)
+        print(
+            f"{name:<20} mean {timings.mean():7.2f} ms  p50 {np.percentile(timings, 50):7.2f} ms  "
+            f"p95 {np.percentile(timings, 95):7.2f} ms  ({len(timings)} frame)"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Benchmark end-to-end pipeline pengenalan produk (khusus CPU).
+
+Setiap tahap diukur terpisah: decode gambar, detect_and_crop_product,
+pre-processing, predict pada beberapa ukuran batch, dan post-processing.
+Hasil berupa JSON (throughput, persentil latensi, puncak RSS) dan dapat
+dibandingkan dengan baseline yang disimpan; regresi melewati toleransi
+membuat proses keluar dengan kode 1.
+
+Contoh:
+    python src/benchmark.py --images sampel/ --output hasil_benchmark.json
+    python src/benchmark.py --save-baseline benchmarks/baseline.json
+    python src/benchmark.py --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+# Benchmark selalu di CPU agar hasil bisa dibandingkan antar mesin
+os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+
+import numpy as np
+
+import inference
+from batch_classify import iter_image_paths
+
+DEFAULT_BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+def peak_rss_bytes():
+    try:
+        import resource
+
+        # ru_maxrss dalam byte di macOS, kilobyte di Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    # Windows tidak punya modul resource; psutil menyediakan peak_wset di sana
+    try:
+        import psutil
+
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    except ImportError:
+        return None
+
+# Fungsi untuk menyiapkan gambar uji: file sampel (bytes JPEG/PNG) dan/atau gambar sintetis
+def load_inputs(images_dir, synthetic, size, seed):
+    import cv2
+
+    encoded = []
+    if images_dir:
+        for path in iter_image_paths([images_dir], recursive=True):
+            with open(path, "rb") as f:
+                encoded.append(f.read())
+    rng = np.random.default_rng(seed)
+    width, height = size
+    for _ in range(synthetic):
+        # Gradien + noise agar ukuran JPEG dan biaya decode mendekati foto asli
+        base = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+        frame = np.clip(base + rng.normal(0, 40, (height, width, 3)), 0, 255).astype(np.uint8)
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if ok:
+            encoded.append(data.tobytes())
+    if not encoded:
+        raise ValueError("Tidak ada gambar uji; berikan --images atau --synthetic > 0")
+    return encoded
+
+def summarize(timings, items_per_call=1):
+    timings_ms = np.array(timings) * 1000.0
+    total = float(np.sum(timings))
+    return {
+        "calls": len(timings),
+        "latency_ms_mean": round(float(timings_ms.mean()), 4),
+        "latency_ms_p50": round(float(np.percentile(timings_ms, 50)), 4),
+        "latency_ms_p95": round(float(np.percentile(timings_ms, 95)), 4),
+        "latency_ms_p99": round(float(np.percentile(timings_ms, 99)), 4),
+        "throughput_per_s": round(len(timings) * items_per_call / total, 3) if total > 0 else None,
+    }
+
+def time_calls(func, items, repeats, warmup=1):
+    for item in items[:warmup]:
+        func(item)
+    timings = []
+    for _ in range(repeats):
+        for item in items:
+            start = time.perf_counter()
+            func(item)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+# Post-processing seperti di GUI: kalibrasi, top-k, dan threshold per kelas untuk satu batch
+def postprocess(predictions):
+    return inference.postprocessor.process(predictions)
+
+def run_benchmark(encoded, batch_sizes, repeats, predict_iterations):
+    import cv2
+
+    stages = {}
+
+    def decode(data):
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    stages["decode"] = summarize(time_calls(decode, encoded, repeats))
+    frames = [frame for frame in map(decode, encoded) if frame is not None]
+
+    stages["detect_and_crop_product"] = summarize(time_calls(inference.detect_and_crop_product, frames, repeats))
+    stages["preprocess"] = summarize(time_calls(inference.preprocess_bgr, frames, repeats))
+
+    for batch_size in batch_sizes:
+        input_buffer = inference.make_input_buffer(batch_size)
+        batch_frames = [frames[i % len(frames)] for i in range(batch_size)]
+        batch = input_buffer.from_images(batch_frames, bgr=True)
+        stages[f"predict_batch_{batch_size}"] = summarize(
+            time_calls(inference.predict_batch, [batch] * predict_iterations, 1, warmup=2), items_per_call=batch_size
+        )
+
+    rows = inference.predict_batch(inference.make_input_buffer(len(frames[:64])).from_images(frames[:64], bgr=True))
+    stages["postprocess"] = summarize(time_calls(postprocess, [rows], max(repeats, 10) * 10), items_per_call=len(rows))
+    return stages
+
+# Fungsi untuk membandingkan hasil dengan baseline; mengembalikan daftar pesan regresi
+def compare_with_baseline(stages, peak_rss, baseline, tolerance):
+    regressions = []
+    for name, current in stages.items():
+        reference = baseline.get("stages", {}).get(name)
+        if reference is None:
+            continue
+        for field, label in (("latency_ms_p50", "p50"), ("latency_ms_p99", "p99")):
+            if not reference.get(field) or current.get(field) is None:
+                continue
+            if current[field] > reference[field] * (1.0 + tolerance):
+                regressions.append(
+                    f"{name}: {label} {current[field]:.3f} ms > baseline {reference[field]:.3f} ms "
+                    f"(+{(current[field] / reference[field] - 1) * 100:.1f}%)"
+                )
+        # Throughput lebih besar lebih baik: regresi bila turun melewati toleransi
+        reference_rate, current_rate = reference.get("throughput_per_s"), current.get("throughput_per_s")
+        if reference_rate and current_rate is not None and current_rate < reference_rate / (1.0 + tolerance):
+            regressions.append(
+                f"{name}: throughput {current_rate:.1f}/s < baseline {reference_rate:.1f}/s "
+                f"({(current_rate / reference_rate - 1) * 100:.1f}%)"
+            )
+    reference_rss = baseline.get("peak_rss_bytes")
+    if reference_rss and peak_rss and peak_rss > reference_rss * (1.0 + tolerance):
+        regressions.append(f"peak RSS {peak_rss / 2**20:.1f} MB > baseline {reference_rss / 2**20:.1f} MB")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline pengenalan produk per tahap (CPU).")
+    parser.add_argument("--images", help="Folder gambar sampel")
+    parser.add_argument("--synthetic", type=int, default=16, help="Jumlah gambar sintetis tambahan")
+    parser.add_argument("--size", default="1280x720", help="Ukuran gambar sintetis, LEBARxTINGGI")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)), help="Ukuran batch predict, dipisah koma")
+    parser.add_argument("--repeats", type=int, default=3, help="Pengulangan untuk tahap per gambar")
+    parser.add_argument("--predict-iterations", type=int, default=10, help="Jumlah pemanggilan predict per ukuran batch")
+    parser.add_argument("--seed", type=int, default=0, help="Seed gambar sintetis")
+    parser.add_argument("--output", help="Simpan hasil ke file JSON")
+    parser.add_argument("--baseline", help="File baseline JSON untuk deteksi regresi")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Toleransi regresi relatif terhadap baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="Simpan hasil sebagai baseline baru")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    batch_sizes = [int(v) for v in args.batch_sizes.split(",") if v.strip()]
+    encoded = load_inputs(args.images, args.synthetic, (width, height), args.seed)
+
+    startup = inference.load_all()
+    stages = run_benchmark(encoded, batch_sizes, args.repeats, args.predict_iterations)
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count()},
+        "model_path": inference.model_path,
+        "images": len(encoded),
+        "startup_seconds": startup,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "stages": stages,
+    }
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(stages, result["peak_rss_bytes"], baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESI PERFORMA TERDETEKSI:", file=sys.stderr)
+            for message in regressions:
+                print(f"  - {message}", file=sys.stderr)
+            return 1
+        print(f"\nTidak ada regresi dibanding baseline {args.baseline} (toleransi {args.tolerance:.0%}).", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
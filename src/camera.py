@@ -0,0 +1,155 @@
+"""Pengambilan frame kamera dan rendering preview yang hemat CPU.
+
+- FrameGrabber: thread khusus yang membaca kamera terus-menerus dan hanya
+  menyimpan frame terbaru. Frame yang tertimpa sebelum sempat ditampilkan
+  dihitung sebagai frame terlewat.
+- PreviewRenderer: memperkecil frame ke ukuran label sebelum konversi warna,
+  memakai ulang buffer resize/RGB dan satu PhotoImage untuk semua frame.
+- PreviewStats: persentase CPU untuk render preview dan thread grabber.
+
+Frame yang diberikan FrameGrabber tidak pernah diubah setelah diterbitkan,
+sehingga aman dibagi ke worker inferensi tanpa disalin.
+"""
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageTk
+
+from live import RateMeter
+
+class FrameGrabber:
+    def __init__(self, source):
+        import cv2
+
+        self.cap = cv2.VideoCapture(source)
+        self._lock = threading.Lock()
+        self._frame = None
+        self._sequence = 0
+        self._consumed = 0
+        self._stop = threading.Event()
+        self.fps_meter = RateMeter()
+        self.grabbed = 0
+        self.dropped = 0
+        self.cpu_seconds = 0.0
+        # FPS yang dilaporkan driver; dipakai sampai fps terukur tersedia
+        reported = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.reported_fps = reported if 1 <= reported <= 240 else 30.0
+        self._thread = threading.Thread(target=self._run, name="camera-grabber", daemon=True)
+        if self.cap.isOpened():
+            self._thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened() and not self._stop.is_set()
+
+    @property
+    def fps(self):
+        return self.fps_meter.rate or self.reported_fps
+
+    def _run(self):
+        cpu_start = time.thread_time()
+        while not self._stop.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self.fps_meter.tick()
+            with self._lock:
+                if self._sequence > self._consumed:
+                    self.dropped += 1  # Frame sebelumnya belum sempat diambil
+                self._frame = frame
+                self._sequence += 1
+                self.grabbed += 1
+            self.cpu_seconds = time.thread_time() - cpu_start
+
+    # Mengembalikan (nomor urut, frame) terbaru; frame None bila belum ada
+    def latest(self):
+        with self._lock:
+            self._consumed = self._sequence
+            return self._sequence, self._frame
+
+    def release(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self.cap.release()
+
+class PreviewRenderer:
+    def __init__(self, label, width, height):
+        self.label = label
+        self.width = width
+        self.height = height
+        self._photo = None
+        self._size = None
+        self._resized = None
+        self._rgb = None
+        self.rendered = 0
+        self.cpu_seconds = 0.0
+        self.fps_meter = RateMeter()
+
+    # Ukuran preview yang mempertahankan rasio aspek frame di dalam label
+    def _fit(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.width / w, self.height / h)
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
+    def _ensure_buffers(self, size):
+        if self._size == size:
+            return
+        width, height = size
+        self._size = size
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self._photo = ImageTk.PhotoImage("RGB", size)
+        self.label.config(image=self._photo)
+        self.label.image = self._photo  # Simpan referensi ke image
+
+    # Fungsi untuk menampilkan frame BGR; overlay berisi (box di koordinat frame, teks)
+    def render(self, frame, overlay=(), draw=None):
+        import cv2
+
+        cpu_start = time.thread_time()
+        size = self._fit(frame)
+        self._ensure_buffers(size)
+        cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        if overlay and draw is not None:
+            scale_x = size[0] / frame.shape[1]
+            scale_y = size[1] / frame.shape[0]
+            scaled = [
+                ((int(x0 * scale_x), int(y0 * scale_y), int(x1 * scale_x), int(y1 * scale_y)), text)
+                for (x0, y0, x1, y1), text in overlay
+            ]
+            draw(self._resized, scaled)
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        # Image.frombuffer membungkus buffer NumPy tanpa salinan; paste mengisi PhotoImage yang sama
+        self._photo.paste(Image.frombuffer("RGB", size, self._rgb, "raw", "RGB", 0, 1))
+        self.rendered += 1
+        self.fps_meter.tick()
+        self.cpu_seconds += time.thread_time() - cpu_start
+
+# Statistik preview: pemakaian CPU thread Tk untuk render dan thread grabber, per detik
+class PreviewStats:
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.reset()
+
+    def reset(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = self.renderer.cpu_seconds
+        self.grabber_cpu_start = 0.0
+        self.cpu_percent = 0.0
+        self.grabber_cpu_percent = 0.0
+
+    # Mengembalikan True bila statistik diperbarui (paling sering sekali per detik)
+    def update(self, grabber):
+        now = time.perf_counter()
+        elapsed = now - self.wall_start
+        if elapsed < 1.0:
+            return False
+        self.cpu_percent = (self.renderer.cpu_seconds - self.cpu_start) / elapsed * 100
+        if grabber is not None:
+            self.grabber_cpu_percent = (grabber.cpu_seconds - self.grabber_cpu_start) / elapsed * 100
+            self.grabber_cpu_start = grabber.cpu_seconds
+        self.wall_start = now
+        self.cpu_start = self.renderer.cpu_seconds
+        return True
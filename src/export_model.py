@@ -0,0 +1,178 @@
+"""Ekspor model Keras ke SavedModel dan TFLite (float32, float16, int8) lalu bandingkan hasilnya.
+
+Contoh:
+    python src/export_model.py --calibration-dir sampel_kalibrasi/ --output-dir exported/
+
+Setiap varian dilaporkan latensi (batch 1), tambahan memori saat dimuat, ukuran file,
+dan kecocokan top-1 terhadap model .h5 asli. Pilih varian saat runtime dengan
+PRODUCT_DETECTION_MODEL=exported/model_int8.tflite atau opsi --model di batch_classify.py.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+import backends
+from batch_classify import iter_image_paths
+from inference import preprocess_image, resource_path
+
+VARIANTS = ("savedmodel", "float32", "float16", "int8")
+
+# Fungsi untuk memuat gambar sampel sebagai batch float32 (N, 224, 224, 3)
+def load_samples(folder, limit):
+    samples = []
+    for path in iter_image_paths([folder], recursive=True):
+        try:
+            with Image.open(path) as image:
+                samples.append(preprocess_image(image.convert("RGB"))[0])
+        except Exception as e:
+            logging.warning(f"Gambar sampel dilewati {path}: {e}")
+        if len(samples) >= limit:
+            break
+    if not samples:
+        raise ValueError(f"Tidak ada gambar sampel yang bisa dibaca di {folder}")
+    return np.stack(samples).astype(np.float32)
+
+def export_savedmodel(model, path):
+    import tensorflow as tf
+
+    if hasattr(model, "export"):
+        model.export(path)
+    else:
+        tf.saved_model.save(model, path)
+    return path
+
+def convert_tflite(savedmodel_path, path, variant, calibration=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(savedmodel_path)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if calibration is None:
+            raise ValueError("Kuantisasi int8 membutuhkan --calibration-dir")
+
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[np.newaxis]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+def _rss_bytes():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+def _file_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+# Fungsi untuk mengukur latensi, memori, dan kecocokan top-1 satu varian model
+def evaluate(path, name, samples, reference_top1, repeats):
+    gc.collect()
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    backend = backends.create_backend(path, name)
+    load_seconds = time.perf_counter() - start
+    rss_after = _rss_bytes()
+
+    backend.predict(samples[:1])  # Pemanasan, tidak dihitung
+    latencies = []
+    top1 = []
+    for _ in range(repeats):
+        for sample in samples:
+            start = time.perf_counter()
+            predictions = backend.predict(sample[np.newaxis])
+            latencies.append(time.perf_counter() - start)
+            top1.append(int(np.argmax(predictions[0])))
+    top1 = np.array(top1[:len(samples)])
+    latencies_ms = np.array(latencies) * 1000.0
+
+    return {
+        "path": path,
+        "backend": name,
+        "file_size_bytes": _file_size(path),
+        "load_seconds": round(load_seconds, 3),
+        "memory_delta_bytes": None if rss_before is None else rss_after - rss_before,
+        "latency_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies_ms, 95)), 3),
+        "top1_agreement": None if reference_top1 is None else round(float(np.mean(top1 == reference_top1)), 4),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor model ke SavedModel/TFLite dan bandingkan latensi serta akurasinya.")
+    parser.add_argument("--model", default=resource_path("model_mobilenet_fixed1.h5"), help="Path model Keras .h5")
+    parser.add_argument("--output-dir", default="exported", help="Folder hasil ekspor")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"Varian yang diekspor, dipisah koma ({', '.join(VARIANTS)})")
+    parser.add_argument("--calibration-dir", help="Folder gambar untuk kalibrasi int8")
+    parser.add_argument("--calibration-samples", type=int, default=200, help="Jumlah gambar kalibrasi maksimum")
+    parser.add_argument("--eval-dir", help="Folder gambar untuk evaluasi (default: folder kalibrasi)")
+    parser.add_argument("--eval-samples", type=int, default=100, help="Jumlah gambar evaluasi maksimum")
+    parser.add_argument("--repeats", type=int, default=1, help="Berapa kali setiap gambar evaluasi diprediksi")
+    parser.add_argument("--report", help="Simpan laporan perbandingan ke file JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"Varian tidak dikenal: {', '.join(sorted(unknown))}")
+    if "int8" in variants and not args.calibration_dir:
+        parser.error("Varian int8 membutuhkan --calibration-dir")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    calibration = load_samples(args.calibration_dir, args.calibration_samples) if args.calibration_dir else None
+    eval_dir = args.eval_dir or args.calibration_dir
+    samples = load_samples(eval_dir, args.eval_samples) if eval_dir else np.random.rand(8, 224, 224, 3).astype(np.float32)
+
+    reference = backends.create_backend(args.model, "keras")
+    savedmodel_path = export_savedmodel(reference.model, os.path.join(args.output_dir, "model_savedmodel"))
+    logging.info(f"SavedModel disimpan di {savedmodel_path}")
+
+    outputs = []
+    if "savedmodel" in variants:
+        outputs.append((savedmodel_path, "savedmodel"))
+    for variant in ("float32", "float16", "int8"):
+        if variant in variants:
+            path = convert_tflite(savedmodel_path, os.path.join(args.output_dir, f"model_{variant}.tflite"), variant, calibration)
+            logging.info(f"Model TFLite {variant} disimpan di {path}")
+            outputs.append((path, "tflite"))
+
+    reference_top1 = np.argmax(reference.predict(samples), axis=1)
+    del reference
+    report = [evaluate(args.model, "keras", samples, reference_top1, args.repeats)]
+    for path, name in outputs:
+        report.append(evaluate(path, name, samples, reference_top1, args.repeats))
+
+    print(f"{'varian':<40} {'ukuran':>10} {'p50 ms':>8} {'p95 ms':>8} {'memori':>10} {'top-1':>7}")
+    for row in report:
+        memory = "-" if row["memory_delta_bytes"] is None else f"{row['memory_delta_bytes'] / 2**20:.1f}MB"
+        print(
+            f"{os.path.basename(row['path']):<40} {row['file_size_bytes'] / 2**20:>8.1f}MB "
+            f"{row['latency_ms_p50']:>8.2f} {row['latency_ms_p95']:>8.2f} {memory:>10} {row['top1_agreement']:>7.2%}"
+        )
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+
+import numpy as np
+
+import backends
+import metrics
+from postprocessing import CONFIG_ENV as POSTPROCESS_CONFIG_ENV, PostProcessor
+from prediction_cache import PredictionCache, model_fingerprint
+from preprocessing import INPUT_SIZE, InputBuffer
+
+# TensorFlow, MediaPipe, dan cv2 sengaja tidak di-import di sini agar aplikasi
+# bisa tampil lebih dulu; semuanya dimuat saat inferensi pertama atau lewat load_all().
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+# Daftar kelas produk yang sesuai dengan output model
+product_labels = ["ButterCookies", "Chitato", "Cocacola", "FrisianFlag", "KokoCrunch", "Milkita", "Neoguri", "Silverqueen", "Togo", "Top"]
+
+# Post-processing bersama (top-k, threshold per kelas, temperature) untuk GUI, CLI, dan server
+postprocess_config_path = os.environ.get(POSTPROCESS_CONFIG_ENV) or resource_path("postprocessing.json")
+postprocessor = PostProcessor.from_config(product_labels, postprocess_config_path)
+
+# Backend dan path model dapat diganti lewat variabel lingkungan atau configure_backend()
+backend_name = os.environ.get(backends.BACKEND_ENV) or None
+model_path = os.environ.get(backends.MODEL_ENV) or resource_path("model_mobilenet_fixed1.h5")
+# Bila True, pembagian /255 dilakukan oleh layer Rescaling di model, bukan saat pre-processing
+normalize_in_graph = os.environ.get(backends.NORMALIZE_IN_GRAPH_ENV) == "1"
+# Jumlah thread inferensi (None = bawaan runtime, biasanya semua core)
+num_threads = int(os.environ.get(backends.THREADS_ENV) or 0) or None
+# Kompilasi XLA untuk fungsi inferensi backend keras
+jit_compile = os.environ.get(backends.XLA_ENV) == "1"
+
+# Model aktif: backend, label, dan post-processing selalu diganti bersamaan (lihat swap_model).
+# fingerprint adalah sidik jari file model saat dimuat, kunci cache prediksi untuk model ini.
+ActiveModel = namedtuple("ActiveModel", ["name", "path", "backend", "labels", "postprocessor", "fingerprint"])
+
+_active = None
+_hands = None
+_load_lock = threading.Lock()
+
+# Registry model (None bila model tunggal dari model_path; lihat enable_model_registry)
+model_registry = None
+
+# Rincian waktu startup (detik) per tahap, diisi saat model dan detektor dimuat
+startup_timings = {}
+
+def _timed(stage, func):
+    start = time.perf_counter()
+    result = func()
+    startup_timings[stage] = time.perf_counter() - start
+    return result
+
+# Fungsi untuk memilih backend inferensi sebelum model dimuat
+def configure_backend(name=None, path=None, in_graph_normalization=None, threads=None):
+    global backend_name, model_path, normalize_in_graph, num_threads
+    if _active is not None:
+        raise RuntimeError("Backend sudah dimuat; configure_backend harus dipanggil sebelum inferensi pertama.")
+    if name:
+        backend_name = name
+    if path:
+        model_path = path
+    if in_graph_normalization is not None:
+        normalize_in_graph = in_graph_normalization
+    if threads:
+        num_threads = threads
+
+# Fungsi untuk memuat model yang telah dilatih
+def _load_backend():
+    logging.info(f"Path model: {model_path}")
+    if not os.path.exists(model_path):
+        logging.error(f"Model tidak ditemukan: {model_path}")
+        raise FileNotFoundError("Model tidak ditemukan. Pastikan file model tersedia.")
+
+    name = backend_name or backends.guess_backend(model_path)
+    _timed(f"import_{name}_runtime", lambda: backends.import_runtime(name))
+    return _timed("load_model", lambda: backends.create_backend(model_path, name, normalize_in_graph, num_threads, jit_compile))
+
+MAX_NUM_HANDS = 4
+
+# Fungsi untuk membuat detektor tangan MediaPipe
+def _create_hands():
+    mp = _timed("import_mediapipe", lambda: importlib.import_module("mediapipe"))
+    mp_hands = mp.solutions.hands
+    return _timed(
+        "mediapipe_init",
+        lambda: mp_hands.Hands(static_image_mode=True, max_num_hands=MAX_NUM_HANDS, min_detection_confidence=0.5),
+    )
+
+def _load_active_model():
+    if model_registry is None and os.environ.get(backends.MANIFEST_ENV):
+        enable_model_registry(os.environ[backends.MANIFEST_ENV])
+    if model_registry is not None:
+        model = _timed("load_model", model_registry.load_initial)
+    else:
+        # Sidik jari dihitung sebelum model dibaca, sehingga sesuai dengan isi file yang dimuat
+        fingerprint = _timed("fingerprint_model", lambda: model_fingerprint(model_path)) if os.path.exists(model_path) else None
+        backend = _load_backend()
+        model = ActiveModel(os.path.basename(model_path), model_path, backend, product_labels, postprocessor, fingerprint)
+    _publish(model)
+    return model
+
+# Snapshot model aktif; pemanggil yang butuh pasangan backend+label yang konsisten
+# selama model diganti memakai snapshot ini untuk predict_batch dan post-processing
+def active_model():
+    global _active
+    if _active is None:
+        with _load_lock:
+            if _active is None:
+                _active = _load_active_model()
+    return _active
+
+def get_backend():
+    return active_model().backend
+
+def _publish(model):
+    global product_labels, postprocessor
+    product_labels = model.labels
+    postprocessor = model.postprocessor
+    if prediction_cache is not None:
+        prediction_cache.set_model(model.fingerprint)
+
+# Fungsi untuk mengganti model aktif secara atomik. Permintaan yang sedang berjalan
+# tetap selesai dengan model lama karena sudah memegang referensinya.
+def swap_model(model):
+    global _active
+    with _load_lock:
+        _publish(model)
+        _active = model
+    logging.info(f"Model aktif diganti ke {model.name} ({model.path})")
+
+def get_hands():
+    global _hands
+    if _hands is None:
+        with _load_lock:
+            if _hands is None:
+                _hands = _create_hands()
+    return _hands
+
+def is_loaded():
+    return _active is not None and _hands is not None
+
+# Ukuran batch default untuk warm-up: satu gambar (mode File) dan semua tangan (mode Kamera)
+DEFAULT_WARMUP_BATCH_SIZES = (1, MAX_NUM_HANDS)
+
+# Fungsi warm-up satu backend pada input dummy; mengembalikan {ukuran batch: detik pemanggilan pertama}
+def warm_up_backend(backend, batch_sizes=DEFAULT_WARMUP_BATCH_SIZES):
+    first_calls = {}
+    for batch_size in sorted(set(batch_sizes)):
+        batch = make_input_buffer(batch_size).from_images([np.zeros((*INPUT_SIZE, 3), dtype=np.uint8)] * batch_size)
+        start = time.perf_counter()
+        backend.predict(batch)
+        first = first_calls[batch_size] = time.perf_counter() - start
+        start = time.perf_counter()
+        backend.predict(batch)
+        steady = time.perf_counter() - start
+        logging.info(f"Warm-up batch {batch_size}: pertama {first:.3f} detik, berikutnya {steady:.3f} detik")
+    return first_calls
+
+# Fungsi warm-up: jalankan inferensi pada input dummy agar tracing/kompilasi graph dan
+# inisialisasi MediaPipe terjadi saat startup, bukan saat pengguna pertama menekan tombol
+def warm_up(batch_sizes=DEFAULT_WARMUP_BATCH_SIZES):
+    for batch_size, seconds in warm_up_backend(get_backend(), batch_sizes).items():
+        startup_timings[f"warmup_predict_{batch_size}"] = seconds
+    hands = get_hands()
+    blank = np.zeros((DETECTION_MAX_SIDE * 3 // 4, DETECTION_MAX_SIDE, 3), dtype=np.uint8)
+    _timed("warmup_mediapipe", lambda: hands.process(blank))
+
+# Fungsi untuk memuat semua dependensi berat sekaligus dan mencatat rincian waktunya
+def load_all(warmup_batch_sizes=DEFAULT_WARMUP_BATCH_SIZES):
+    start = time.perf_counter()
+    _timed("import_cv2", lambda: importlib.import_module("cv2"))
+    get_backend()
+    get_hands()
+    if warmup_batch_sizes:
+        warm_up(warmup_batch_sizes)
+    startup_timings["total"] = time.perf_counter() - start
+    breakdown = ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in startup_timings.items())
+    logging.info(f"Waktu startup inferensi: {breakdown}")
+    return dict(startup_timings)
+
+# Buffer input per thread agar tensor (1, 224, 224, 3) tidak dialokasikan ulang setiap pemanggilan
+_input_buffers = threading.local()
+
+def make_input_buffer(max_batch):
+    return InputBuffer(max_batch, normalize=not normalize_in_graph)
+
+def _thread_input_buffer(batch_size=1):
+    buffer = getattr(_input_buffers, "buffer", None)
+    if buffer is None or buffer.max_batch < batch_size:
+        # Kapasitas awal cukup untuk max_num_hands agar multi-produk tidak perlu alokasi ulang
+        buffer = _input_buffers.buffer = make_input_buffer(max(batch_size, MAX_NUM_HANDS))
+    return buffer
+
+# Fungsi pre-processing untuk array BGR (frame cv2) atau RGB; hasilnya view buffer per thread
+@metrics.timed("preprocess")
+def preprocess_bgr(image):
+    return _thread_input_buffer().from_image(image, bgr=True)
+
+@metrics.timed("preprocess")
+def preprocess_rgb(image):
+    return _thread_input_buffer().from_image(image, bgr=False)
+
+# Fungsi untuk pre-processing gambar PIL; mengembalikan salinan yang aman disimpan
+def preprocess_image(image):
+    try:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return preprocess_rgb(np.asarray(image)).copy()
+    except Exception as e:
+        logging.error(f"Error saat pre-processing gambar: {e}", exc_info=True)
+        raise
+
+# Latensi prediksi pertama setelah startup dicatat sekali untuk dibandingkan dengan hasil warm-up
+_first_prediction_logged = False
+
+# Fungsi untuk prediksi satu batch gambar sekaligus (N, 224, 224, 3); model berupa snapshot
+# active_model() bila pemanggil perlu memakai post-processor yang sama dengan model yang memprediksi
+@metrics.timed("predict")
+def predict_batch(batch, model=None):
+    global _first_prediction_logged
+    model = model or active_model()
+    start = time.perf_counter()
+    predictions = model.backend.predict(batch)
+    seconds = time.perf_counter() - start
+    if not _first_prediction_logged:
+        _first_prediction_logged = True
+        logging.info(f"Prediksi pertama (batch {len(batch)}): {seconds:.3f} detik")
+    if model_registry is not None:
+        model_registry.maybe_shadow(model, batch, predictions, seconds)
+    return predictions
+
+# Cache prediksi (None bila belum diaktifkan lewat enable_prediction_cache)
+prediction_cache = None
+
+def enable_prediction_cache(max_entries=1024, disk_path=None, disk_max_bytes=256 * 1024 * 1024):
+    global prediction_cache
+    # Sebelum model dimuat, sidik jari diisi oleh _publish; model_path belum tentu model yang dipakai (mis. registry)
+    fingerprint = _active.fingerprint if _active is not None else None
+    prediction_cache = PredictionCache(fingerprint, max_entries, disk_path, disk_max_bytes)
+    return prediction_cache
+
+# Fungsi untuk memuat model dari manifest (lihat model_registry.py); dipanggil sebelum inferensi pertama
+def enable_model_registry(manifest_path, watch_interval=5.0):
+    global model_registry
+    from model_registry import ModelRegistry
+
+    if _active is not None:
+        raise RuntimeError("Model sudah dimuat; enable_model_registry harus dipanggil sebelum inferensi pertama.")
+    model_registry = ModelRegistry(manifest_path, watch_interval)
+    return model_registry
+
+# Fungsi untuk prediksi satu gambar (array RGB/BGR hasil decode) dengan memanfaatkan cache
+def predict_image(image, bgr=False, use_cache=True, model=None):
+    cache = prediction_cache if use_cache else None
+    model = model or active_model()
+    key = None
+    if cache is not None:
+        key = cache.key(image, "bgr" if bgr else "rgb")
+        cached = cache.get(key, model.fingerprint)
+        if cached is not None:
+            return cached
+    input_image = preprocess_bgr(image) if bgr else preprocess_rgb(image)
+    predictions = predict_batch(input_image, model)[0]
+    if key is not None:
+        cache.put(key, predictions, model.fingerprint)
+    return predictions
+
+# Sisi terpanjang frame saat dikirim ke MediaPipe; landmark dinormalisasi [0, 1]
+# sehingga bisa dipetakan kembali ke resolusi penuh tanpa kehilangan posisi
+DETECTION_MAX_SIDE = 640
+CROP_MARGIN = 50
+
+# Fungsi untuk menjalankan MediaPipe satu kali pada frame yang diperkecil
+def detect_hand_landmarks(image):
+    import cv2
+
+    hands = get_hands()
+    h, w = image.shape[:2]
+    scale = DETECTION_MAX_SIDE / max(h, w)
+    if scale < 1.0:
+        small = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    else:
+        small = image
+    rgb_image = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    results = hands.process(rgb_image)
+    if not results.multi_hand_landmarks:
+        return []
+    # Setiap tangan menjadi array (21, 2) berisi koordinat x, y ternormalisasi
+    return [
+        np.array([(lm.x, lm.y) for lm in hand_landmarks.landmark], dtype=np.float32)
+        for hand_landmarks in results.multi_hand_landmarks
+    ]
+
+# Fungsi untuk menghitung bounding box (x_min, y_min, x_max, y_max) dari landmark tangan
+def landmarks_to_box(landmarks, width, height, margin=CROP_MARGIN):
+    points = np.clip(landmarks, 0.0, 1.0) * (width, height)
+    x_min, y_min = points.min(axis=0).astype(int) - margin
+    x_max, y_max = points.max(axis=0).astype(int) + margin
+    return max(0, x_min), max(0, y_min), min(width, x_max), min(height, y_max)
+
+# Fungsi untuk menggabungkan kotak yang saling tumpang tindih (mis. dua tangan memegang satu produk)
+def merge_overlapping_boxes(boxes, iou_threshold=0.3):
+    merged = []
+    for box in sorted(boxes):
+        for index, other in enumerate(merged):
+            ix = max(0, min(box[2], other[2]) - max(box[0], other[0]))
+            iy = max(0, min(box[3], other[3]) - max(box[1], other[1]))
+            intersection = ix * iy
+            union = (box[2] - box[0]) * (box[3] - box[1]) + (other[2] - other[0]) * (other[3] - other[1]) - intersection
+            if union > 0 and intersection / union > iou_threshold:
+                merged[index] = (min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3]))
+                break
+        else:
+            merged.append(box)
+    return merged
+
+# Fungsi untuk mendeteksi semua tangan dan melakukan crop; hasil berupa daftar (crop, box)
+# terurut dari kiri ke kanan. Tanpa tangan, seluruh gambar dikembalikan sebagai satu region.
+@metrics.timed("detect_and_crop_product")
+def detect_and_crop_products(image):
+    try:
+        h, w = image.shape[:2]
+        boxes = [landmarks_to_box(landmarks, w, h) for landmarks in detect_hand_landmarks(image)]
+        boxes = [box for box in boxes if box[2] > box[0] and box[3] > box[1]]
+
+        # Jika tidak ada tangan terdeteksi, kembalikan gambar utuh
+        if not boxes:
+            return [(image, (0, 0, w, h))]
+
+        # Crop area produk dengan memfokuskan lebih pada area yang lebih besar
+        return [
+            (image[y_min:y_max, x_min:x_max], (x_min, y_min, x_max, y_max))
+            for x_min, y_min, x_max, y_max in merge_overlapping_boxes(boxes)
+        ]
+    except Exception as e:
+        logging.error(f"Error saat deteksi dan crop produk: {e}", exc_info=True)
+        raise
+
+# Fungsi untuk mendeteksi tangan dan melakukan crop (hanya tangan paling kiri)
+def detect_and_crop_product(image):
+    return detect_and_crop_products(image)[0][0]
+
+# Fungsi untuk mengklasifikasi beberapa crop BGR sekaligus dalam satu pemanggilan predict
+def classify_crops(crops, model=None):
+    return predict_batch(_thread_input_buffer(len(crops)).from_images(crops, bgr=True), model)
@@ -0,0 +1,84 @@
+"""Utilitas untuk mode pengenalan live dari kamera.
+
+- FrameSkipper: menentukan frame mana yang dikirim ke inferensi (setiap frame ke-N),
+  dengan N menyesuaikan diri terhadap latensi inferensi.
+- PredictionSmoother: EMA atas vektor probabilitas dan voting mayoritas atas label
+  beberapa frame terakhir agar label yang tampil tidak berkedip.
+- RateMeter: menghitung fps (kamera maupun inferensi) dengan jendela geser.
+"""
+import math
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+class RateMeter:
+    def __init__(self, window_seconds=2.0):
+        self.window_seconds = window_seconds
+        self._events = deque()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self._events.append(now)
+        while self._events and now - self._events[0] > self.window_seconds:
+            self._events.popleft()
+
+    @property
+    def rate(self):
+        if len(self._events) < 2:
+            return 0.0
+        elapsed = self._events[-1] - self._events[0]
+        return (len(self._events) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def reset(self):
+        self._events.clear()
+
+class FrameSkipper:
+    def __init__(self, min_interval=1, max_interval=15):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._frames_since_submit = 0
+
+    # Dipanggil untuk setiap frame kamera, termasuk saat inferensi sebelumnya masih berjalan (busy),
+    # agar jarak N frame dihitung dari frame terakhir yang dikirim, bukan dari saat hasilnya tiba.
+    # True bila frame ini perlu diinferensi.
+    def should_process(self, busy=False):
+        self._frames_since_submit += 1
+        if busy or self._frames_since_submit < self.interval:
+            return False
+        self._frames_since_submit = 0
+        return True
+
+    # Sesuaikan N agar inferensi tidak tertinggal dari kamera
+    def update(self, inference_seconds, camera_fps):
+        if camera_fps <= 0:
+            return
+        frames_per_inference = math.ceil(inference_seconds * camera_fps)
+        self.interval = max(self.min_interval, min(self.max_interval, frames_per_inference))
+
+    def reset(self):
+        self.interval = self.min_interval
+        self._frames_since_submit = 0
+
+class PredictionSmoother:
+    def __init__(self, alpha=0.4, window=5):
+        self.alpha = alpha
+        self.window = window
+        self._ema = None
+        self._labels = deque(maxlen=window)
+
+    # Mengembalikan (indeks label stabil, confidence EMA untuk label tersebut)
+    def update(self, predictions):
+        predictions = np.asarray(predictions, dtype=np.float32)
+        if self._ema is None:
+            self._ema = predictions.copy()
+        else:
+            self._ema += self.alpha * (predictions - self._ema)
+        self._labels.append(int(np.argmax(self._ema)))
+        label_index = Counter(self._labels).most_common(1)[0][0]
+        return label_index, float(self._ema[label_index])
+
+    def reset(self):
+        self._ema = None
+        self._labels.clear()
@@ -0,0 +1,95 @@
+"""Uji beban untuk server.py: kirim banyak permintaan bersamaan lalu laporkan p50/p99 dan throughput.
+
+Contoh:
+    python src/load_test.py --url http://127.0.0.1:8080 --images sampel/ --requests 1000 --concurrency 32
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+from batch_classify import iter_image_paths
+
+def load_payloads(folder):
+    payloads = []
+    for path in iter_image_paths([folder], recursive=True):
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        raise ValueError(f"Tidak ada gambar di {folder}")
+    return payloads
+
+async def wait_until_ready(session, url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with session.get(f"{url}/readyz") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server {url} belum siap setelah {timeout} detik")
+
+async def run(url, payloads, total, concurrency, crop, ready_timeout):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    payload_cycle = itertools.cycle(payloads)
+    predict_url = f"{url}/predict?crop={1 if crop else 0}"
+
+    async with aiohttp.ClientSession() as session:
+        await wait_until_ready(session, url, ready_timeout)
+
+        async def client():
+            nonlocal errors
+            while next(counter) < total:
+                data = next(payload_cycle)
+                start = time.perf_counter()
+                try:
+                    async with session.post(predict_url, data=data, headers={"Content-Type": "application/octet-stream"}) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except aiohttp.ClientError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+        "latency_ms_p99": round(float(np.percentile(latencies_ms, 99)), 3) if len(latencies_ms) else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban layanan HTTP klasifikasi produk.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Alamat server")
+    parser.add_argument("--images", required=True, help="Folder gambar yang dikirim bergantian")
+    parser.add_argument("--requests", type=int, default=500, help="Jumlah total permintaan")
+    parser.add_argument("--concurrency", type=int, default=16, help="Jumlah klien bersamaan")
+    parser.add_argument("--crop", action="store_true", help="Minta server melakukan crop area tangan")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Batas waktu menunggu /readyz")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.url.rstrip("/"), load_payloads(args.images), args.requests, args.concurrency, args.crop, args.ready_timeout))
+    print(json.dumps(report, indent=2))
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
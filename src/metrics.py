@@ -0,0 +1,253 @@
+"""Instrumentasi ringan: timer per tahap, histogram di memori, dan ekspor berkala.
+
+Pemakaian:
+    @metrics.timed("predict")
+    def predict_batch(...): ...
+
+    with metrics.timer("gui_render"):
+        ...
+
+    metrics.start_exporter(jsonl_path="metrics.jsonl", prometheus_path="metrics.prom")
+
+Biaya per pengukuran hanya dua perf_counter dan satu bisect di bawah lock, tanpa
+I/O. Exporter menulis snapshot setiap `interval` detik dari thread terpisah.
+
+Profiling saat runtime: buat file pemicu (default "profile.trigger") di folder kerja,
+atau panggil request_profile(). Pemanggilan fungsi ter-instrumentasi berikutnya
+dijalankan di bawah cProfile, dan tracemalloc aktif selama durasi capture; hasilnya
+ditulis ke folder profil (.prof dan _tracemalloc.txt).
+"""
+import bisect
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Batas bucket histogram (detik), skala log dari 0.1 ms sampai ~30 detik
+BUCKETS = tuple(round(0.0001 * (2 ** (i / 2)), 7) for i in range(37))
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    # Perkiraan persentil dari bucket (batas atas bucket tempat persentil berada)
+    def percentile(self, q):
+        if not self.count:
+            return None
+        target = q / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum_seconds": self.sum,
+            "min_seconds": self.min,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "p99_seconds": self.percentile(99),
+        }
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._profile_lock = threading.Lock()
+        self._profile_pending = 0
+        self._profile_deadline = None
+        self.profile_dir = "profiles"
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self._profile_pending:
+                    return self._profiled_call(name, func, args, kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "histograms": {name: h.snapshot() for name, h in self._histograms.items()},
+                "counters": dict(self._counters),
+            }
+
+    # Format teks Prometheus (histogram kumulatif dalam detik)
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                metric = f"product_detection_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.sum}")
+                lines.append(f"{metric}_count {histogram.count}")
+            for name, value in sorted(self._counters.items()):
+                metric = f"product_detection_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    # === Profiling saat runtime ===
+    def request_profile(self, calls=20, duration=10.0):
+        with self._profile_lock:
+            self._profile_pending = calls
+            self._profile_deadline = time.monotonic() + duration
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        logging.info(f"Profiling diminta untuk {calls} pemanggilan / {duration:.0f} detik")
+
+    def _profiled_call(self, name, func, args, kwargs):
+        with self._profile_lock:
+            if self._profile_pending <= 0:
+                run_profiled = False
+            else:
+                self._profile_pending -= 1
+                run_profiled = True
+        if not run_profiled:
+            with self.timer(name):
+                return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            self.observe(name, time.perf_counter() - start)
+            os.makedirs(self.profile_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{stamp}_{name}_{threading.get_ident()}.prof"))
+            self._maybe_finish_profile()
+
+    def _maybe_finish_profile(self):
+        with self._profile_lock:
+            if self._profile_deadline is None:
+                return
+            if self._profile_pending > 0 and time.monotonic() < self._profile_deadline:
+                return
+            self._profile_pending = 0
+            self._profile_deadline = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_tracemalloc.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+            logging.info(f"Profiling selesai, hasil disimpan di {self.profile_dir}")
+
+class MetricsExporter:
+    def __init__(self, registry, jsonl_path=None, prometheus_path=None, interval=60.0, trigger_path="profile.trigger"):
+        self.registry = registry
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self.trigger_path = trigger_path
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.export()
+
+    def export(self):
+        try:
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self.registry.snapshot()) + "\n")
+            if self.prometheus_path:
+                # Tulis ke file sementara lalu ganti agar pembaca tidak melihat file setengah jadi
+                temp_path = f"{self.prometheus_path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(self.registry.prometheus_text())
+                os.replace(temp_path, self.prometheus_path)
+        except OSError as e:
+            logging.error(f"Gagal menulis metrik: {e}")
+
+    def _check_trigger(self):
+        if self.trigger_path and os.path.exists(self.trigger_path):
+            try:
+                os.remove(self.trigger_path)
+            except OSError:
+                pass
+            self.registry.request_profile()
+
+    def _run(self):
+        next_export = time.monotonic() + self.interval
+        while not self._stop.wait(1.0):
+            self._check_trigger()
+            # Pastikan tracemalloc dihentikan walaupun tidak ada lagi pemanggilan ter-instrumentasi
+            if self.registry._profile_deadline is not None and time.monotonic() >= self.registry._profile_deadline:
+                self.registry._maybe_finish_profile()
+            if time.monotonic() >= next_export:
+                self.export()
+                next_export = time.monotonic() + self.interval
+
+# Registry global yang dipakai seluruh aplikasi
+registry = MetricsRegistry()
+timer = registry.timer
+timed = registry.timed
+observe = registry.observe
+increment = registry.increment
+request_profile = registry.request_profile
+
+def start_exporter(jsonl_path=None, prometheus_path=None, interval=60.0, trigger_path="profile.trigger"):
+    return MetricsExporter(registry, jsonl_path, prometheus_path, interval, trigger_path).start()
@@ -0,0 +1,256 @@
+"""Registry model: beberapa versi model beserta set labelnya, diganti tanpa restart.
+
+Manifest (JSON), path relatif dihitung dari folder manifest:
+    {
+      "active": "v1",
+      "candidate": "v2",
+      "shadow_fraction": 0.05,
+      "models": {
+        "v1": {"path": "model_mobilenet_fixed1.h5", "labels": ["ButterCookies", "..."]},
+        "v2": {"path": "exported/model_float16.tflite", "backend": "tflite",
+               "labels": ["ButterCookies", "..."], "postprocessing": "postprocessing_v2.json"}
+      }
+    }
+
+Manifest dipantau setiap `watch_interval` detik. Bila "active" berubah, versi baru
+dimuat dan di-warm-up di thread pemantau, lalu inference.swap_model mengganti
+model aktif secara atomik. Permintaan yang sedang berjalan tetap selesai dengan
+model lama karena sudah memegang snapshot-nya.
+
+Versi "candidate" dijalankan sebagai shadow: sebagian batch (shadow_fraction)
+juga diprediksi oleh kandidat di thread terpisah. Hasil kandidat tidak pernah
+dikembalikan ke pemanggil. Hasilnya hanya dibandingkan dengan produksi
+(kecocokan label teratas, confidence, latensi per gambar) dan dicatat di log
+serta metrik. Bila thread shadow masih sibuk, sampel dilewati agar produksi
+tidak pernah menunggu.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import backends
+import inference
+import metrics
+from postprocessing import PostProcessor
+from prediction_cache import model_fingerprint
+
+class ShadowStats:
+    def __init__(self, production, candidate):
+        self.production = production
+        self.candidate = candidate
+        self.batches = 0
+        self.images = 0
+        self.agreements = 0
+        self.skipped = 0
+        self.production_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self.production_confidence = 0.0
+        self.candidate_confidence = 0.0
+
+    def snapshot(self):
+        images = self.images or 1
+        return {
+            "production": self.production,
+            "candidate": self.candidate,
+            "batches": self.batches,
+            "images": self.images,
+            "skipped": self.skipped,
+            "top1_agreement": round(self.agreements / images, 4),
+            "production_ms_per_image": round(self.production_seconds / images * 1000.0, 3),
+            "candidate_ms_per_image": round(self.candidate_seconds / images * 1000.0, 3),
+            "production_mean_confidence": round(self.production_confidence / images, 4),
+            "candidate_mean_confidence": round(self.candidate_confidence / images, 4),
+        }
+
+class ModelRegistry:
+    def __init__(self, manifest_path, watch_interval=5.0, warmup_batch_sizes=inference.DEFAULT_WARMUP_BATCH_SIZES):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.watch_interval = watch_interval
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self._manifest, self._manifest_mtime = self._read_manifest()
+        self._active_entry = None
+        self.candidate = None
+        self._candidate_entry = None
+        self.shadow_fraction = 0.0
+        self.shadow_stats = None
+        self._shadow_lock = threading.Lock()
+        self._shadow_busy = False
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._stop = threading.Event()
+        self._watcher = None
+
+    # === Manifest ===
+    def _read_manifest(self):
+        mtime = os.stat(self.manifest_path).st_mtime_ns
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        models = manifest.get("models") or {}
+        for name in (manifest.get("active"), manifest.get("candidate")):
+            if name is not None and name not in models:
+                raise ValueError(f"Versi model '{name}' tidak ada di manifest {self.manifest_path}")
+        if manifest.get("active") is None:
+            raise ValueError(f"Manifest {self.manifest_path} tidak menentukan model aktif")
+        for name, entry in models.items():
+            if not entry.get("path") or not entry.get("labels"):
+                raise ValueError(f"Versi model '{name}' harus memiliki path dan labels")
+        return manifest, mtime
+
+    def _resolve(self, path):
+        return path if os.path.isabs(path) else os.path.join(os.path.dirname(self.manifest_path), path)
+
+    def _postprocessor(self, entry, labels):
+        if entry.get("postprocessing"):
+            return PostProcessor.from_config(labels, self._resolve(entry["postprocessing"]))
+        # Tanpa konfigurasi khusus: pakai konfigurasi global bila cocok dengan set label versi ini
+        try:
+            return PostProcessor.from_config(labels, inference.postprocess_config_path)
+        except ValueError as e:
+            logging.warning(f"Konfigurasi post-processing global tidak cocok ({e}); memakai default")
+            return PostProcessor(labels)
+
+    # Fungsi untuk memuat dan warm-up satu versi model; hasilnya inference.ActiveModel
+    def load_version(self, name):
+        entry = self._manifest["models"][name]
+        path = self._resolve(entry["path"])
+        start = time.perf_counter()
+        # Sidik jari dihitung sebelum model dibaca, sehingga sesuai dengan isi file yang dimuat
+        fingerprint = model_fingerprint(path)
+        backend = backends.create_backend(
+            path, entry.get("backend"), inference.normalize_in_graph, inference.num_threads, inference.jit_compile
+        )
+        inference.warm_up_backend(backend, self.warmup_batch_sizes)
+        labels = list(entry["labels"])
+        logging.info(f"Versi model {name} dimuat dalam {time.perf_counter() - start:.2f} detik ({len(labels)} label)")
+        return inference.ActiveModel(name, path, backend, labels, self._postprocessor(entry, labels), fingerprint)
+
+    # Dipanggil inference saat model pertama kali dibutuhkan (jangan panggil swap_model di sini)
+    def load_initial(self):
+        name = self._manifest["active"]
+        model = self.load_version(name)
+        self._active_entry = (name, self._manifest["models"][name])
+        self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._watcher.start()
+        return model
+
+    def _watch(self):
+        # Kandidat dimuat di thread ini agar startup model aktif tidak tertunda
+        try:
+            self._apply_candidate()
+        except Exception as e:
+            logging.error(f"Gagal memuat model kandidat: {e}", exc_info=True)
+        while not self._stop.wait(self.watch_interval):
+            try:
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+                if mtime == self._manifest_mtime:
+                    continue
+                # Catat mtime lebih dulu agar manifest yang rusak hanya dilaporkan sekali
+                self._manifest_mtime = mtime
+                self._manifest, self._manifest_mtime = self._read_manifest()
+            except (OSError, ValueError) as e:
+                logging.error(f"Manifest model tidak dapat dibaca, konfigurasi lama dipertahankan: {e}")
+                continue
+            logging.info("Manifest model berubah")
+            try:
+                self._apply_active()
+                self._apply_candidate()
+            except Exception as e:
+                logging.error(f"Gagal memuat versi model baru: {e}", exc_info=True)
+
+    def _apply_active(self):
+        name = self._manifest["active"]
+        entry = self._manifest["models"][name]
+        if (name, entry) == self._active_entry:
+            return
+        candidate = self.candidate
+        if candidate is not None and self._candidate_entry == (name, entry):
+            # Kandidat yang dipromosikan sudah dimuat dan di-warm-up; tunggu shadow yang sedang berjalan selesai
+            self.candidate = None
+            self._shadow_executor.submit(lambda: None).result()
+            model = candidate
+            self._candidate_entry = None
+        else:
+            model = self.load_version(name)
+        inference.swap_model(model)
+        self._active_entry = (name, entry)
+        if self.candidate is not None:
+            self.shadow_stats = ShadowStats(name, self.candidate.name)
+
+    def _apply_candidate(self):
+        name = self._manifest.get("candidate")
+        self.shadow_fraction = float(self._manifest.get("shadow_fraction", 0.05))
+        if name is None or name == self._manifest["active"]:
+            self.candidate = None
+            self._candidate_entry = None
+            return
+        entry = self._manifest["models"][name]
+        if self._candidate_entry == (name, entry):
+            return
+        self.candidate = None
+        candidate = self.load_version(name)
+        self.shadow_stats = ShadowStats(self._manifest["active"], name)
+        self._candidate_entry = (name, entry)
+        self.candidate = candidate
+        logging.info(f"Kandidat {name} berjalan sebagai shadow untuk {self.shadow_fraction:.0%} batch")
+
+    # === Shadow ===
+    def maybe_shadow(self, model, batch, predictions, seconds):
+        candidate = self.candidate
+        if candidate is None or random.random() >= self.shadow_fraction:
+            return
+        with self._shadow_lock:
+            if self._shadow_busy:
+                self.shadow_stats.skipped += 1
+                return
+            self._shadow_busy = True
+        # Salin batch karena buffer input dipakai ulang oleh pemanggil
+        self._shadow_executor.submit(
+            self._run_shadow, model, candidate, self.shadow_stats, np.array(batch), np.array(predictions), seconds
+        )
+
+    def _run_shadow(self, model, candidate, stats, batch, predictions, seconds):
+        try:
+            start = time.perf_counter()
+            rows = candidate.backend.predict(batch)
+            candidate_seconds = time.perf_counter() - start
+            metrics.observe("shadow_predict", candidate_seconds)
+            production_index, production_confidence = model.postprocessor.top_k(predictions, k=1)
+            candidate_index, candidate_confidence = candidate.postprocessor.top_k(rows, k=1)
+            # Label dibandingkan berdasarkan nama karena urutan/set label kedua versi bisa berbeda
+            agreements = sum(
+                model.labels[p] == candidate.labels[c]
+                for p, c in zip(production_index[:, 0].tolist(), candidate_index[:, 0].tolist())
+            )
+            stats.batches += 1
+            stats.images += len(batch)
+            stats.agreements += agreements
+            stats.production_seconds += seconds
+            stats.candidate_seconds += candidate_seconds
+            stats.production_confidence += float(production_confidence.sum())
+            stats.candidate_confidence += float(candidate_confidence.sum())
+            if stats.batches % 100 == 0:
+                logging.info(f"Shadow {stats.candidate} vs {stats.production}: {stats.snapshot()}")
+        except Exception as e:
+            logging.error(f"Error saat menjalankan model kandidat: {e}", exc_info=True)
+        finally:
+            with self._shadow_lock:
+                self._shadow_busy = False
+
+    def status(self):
+        active = inference._active
+        return {
+            "manifest": self.manifest_path,
+            "active": active.name if active is not None else None,
+            "candidate": self.candidate.name if self.candidate is not None else None,
+            "shadow_fraction": self.shadow_fraction,
+            "shadow": self.shadow_stats.snapshot() if self.shadow_stats is not None else None,
+        }
+
+    def close(self):
+        self._stop.set()
+        self._shadow_executor.shutdown(wait=False)
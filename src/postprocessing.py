@@ -0,0 +1,242 @@
+"""Post-processing prediksi: kalibrasi, top-k, dan penolakan produk tidak dikenal.
+
+Semua operasi bekerja pada batch baris prediksi (N, jumlah_kelas) sekaligus:
+- kalibrasi temperature scaling: softmax(log(p) / T)
+- top-k memakai argpartition, lalu hanya k kandidat yang diurutkan
+- threshold per kelas: label teratas diterima bila confidence >= threshold
+  kelas tersebut; bila tidak, hasilnya "produk tidak dikenal"
+
+Konfigurasi dibaca dari JSON (default postprocessing.json, atau variabel
+lingkungan PRODUCT_DETECTION_POSTPROCESS):
+    {"temperature": 1.0, "default_threshold": 0.5, "thresholds": {"Top": 0.7}, "top_k": 3}
+
+Temperature dapat dihitung dari folder validasi (subfolder per label):
+    python src/postprocessing.py calibrate validasi/ --output postprocessing.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+CONFIG_ENV = "PRODUCT_DETECTION_POSTPROCESS"
+UNKNOWN_LABEL = "Produk tidak dikenal"
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_TOP_K = 3
+
+# Hasil untuk satu baris prediksi; label berisi UNKNOWN_LABEL bila known False
+Ranking = namedtuple("Ranking", ["label", "confidence", "known", "top_k"])
+
+def _as_batch(probabilities):
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    return probabilities[np.newaxis] if probabilities.ndim == 1 else probabilities
+
+# Temperature scaling pada probabilitas softmax; log(p) setara logit sampai konstanta per baris
+def apply_temperature(probabilities, temperature):
+    probabilities = _as_batch(probabilities)
+    if temperature == 1.0:
+        return probabilities
+    logits = np.log(np.clip(probabilities, 1e-7, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+    return logits
+
+def negative_log_likelihood(probabilities, targets, temperature):
+    calibrated = apply_temperature(probabilities, temperature)
+    return float(-np.mean(np.log(np.clip(calibrated[np.arange(len(targets)), targets], 1e-7, 1.0))))
+
+# Cari temperature dengan NLL terkecil (golden-section search pada log T)
+def fit_temperature(probabilities, targets, low=0.05, high=20.0, iterations=60):
+    targets = np.asarray(targets, dtype=np.int64)
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = np.log(low), np.log(high)
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc = negative_log_likelihood(probabilities, targets, np.exp(c))
+    fd = negative_log_likelihood(probabilities, targets, np.exp(d))
+    for _ in range(iterations):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = negative_log_likelihood(probabilities, targets, np.exp(c))
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = negative_log_likelihood(probabilities, targets, np.exp(d))
+    return float(np.exp((a + b) / 2))
+
+# Expected calibration error dengan bin confidence yang sama lebar
+def expected_calibration_error(probabilities, targets, bins=10):
+    probabilities = _as_batch(probabilities)
+    confidence = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == np.asarray(targets)
+    bin_index = np.minimum((confidence * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        mask = bin_index == b
+        if mask.any():
+            error += mask.mean() * abs(correct[mask].mean() - confidence[mask].mean())
+    return float(error)
+
+class PostProcessor:
+    def __init__(self, labels, default_threshold=DEFAULT_THRESHOLD, thresholds=None, temperature=1.0, top_k=DEFAULT_TOP_K):
+        self.labels = list(labels)
+        self.default_threshold = float(default_threshold)
+        self.temperature = float(temperature)
+        self.top_k_default = int(top_k)
+        self.thresholds = np.full(len(self.labels), self.default_threshold, dtype=np.float32)
+        for label, value in (thresholds or {}).items():
+            if label not in self.labels:
+                raise ValueError(f"Label pada threshold tidak dikenal: {label}")
+            self.thresholds[self.labels.index(label)] = value
+
+    @classmethod
+    def from_config(cls, labels, path):
+        if not path or not os.path.exists(path):
+            return cls(labels)
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        logging.info(f"Konfigurasi post-processing dimuat dari {path}")
+        return cls(
+            labels,
+            config.get("default_threshold", DEFAULT_THRESHOLD),
+            config.get("thresholds"),
+            config.get("temperature", 1.0),
+            config.get("top_k", DEFAULT_TOP_K),
+        )
+
+    def to_config(self):
+        return {
+            "temperature": self.temperature,
+            "default_threshold": self.default_threshold,
+            "thresholds": {
+                label: float(value)
+                for label, value in zip(self.labels, self.thresholds)
+                if value != self.default_threshold
+            },
+            "top_k": self.top_k_default,
+        }
+
+    def calibrate(self, probabilities):
+        return apply_temperature(probabilities, self.temperature)
+
+    # Mengembalikan (indeks, confidence), masing-masing (N, k), terurut menurun per baris
+    def top_k(self, probabilities, k=None):
+        calibrated = self.calibrate(probabilities)
+        if calibrated.shape[1] != len(self.labels):
+            raise ValueError(f"Jumlah kelas prediksi ({calibrated.shape[1]}) tidak sesuai jumlah label ({len(self.labels)})")
+        k = max(1, min(k or self.top_k_default, calibrated.shape[1]))
+        if k < calibrated.shape[1]:
+            candidates = np.argpartition(-calibrated, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(k), calibrated.shape).copy()
+        values = np.take_along_axis(calibrated, candidates, axis=1)
+        order = np.argsort(-values, axis=1)
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+    # Mask (N,) baris yang label teratasnya lolos threshold kelasnya
+    def accepted(self, indices, confidences):
+        return np.asarray(confidences) >= self.thresholds[np.asarray(indices)]
+
+    def accepts(self, index, confidence):
+        return confidence >= self.thresholds[index]
+
+    def process(self, probabilities, k=None):
+        indices, confidences = self.top_k(probabilities, k)
+        known = self.accepted(indices[:, 0], confidences[:, 0])
+        labels = self.labels
+        return [
+            Ranking(
+                labels[row[0]] if is_known else UNKNOWN_LABEL,
+                float(values[0]),
+                bool(is_known),
+                [(labels[i], float(c)) for i, c in zip(row, values)],
+            )
+            for row, values, is_known in zip(indices.tolist(), confidences.tolist(), known.tolist())
+        ]
+
+    def process_one(self, predictions, k=None):
+        return self.process(predictions, k)[0]
+
+# Fungsi untuk memuat prediksi dan label sebenarnya dari folder validasi (satu subfolder per label)
+def predict_validation_folder(folder, labels, batch_size=32, workers=4):
+    from batch_classify import iter_batches, iter_image_paths
+    from inference import make_input_buffer, predict_batch
+
+    paths = []
+    targets = []
+    for name in sorted(os.listdir(folder)):
+        subfolder = os.path.join(folder, name)
+        if not os.path.isdir(subfolder):
+            continue
+        if name not in labels:
+            logging.warning(f"Folder {name} tidak sesuai label mana pun, dilewati")
+            continue
+        for path in iter_image_paths([subfolder], recursive=True):
+            paths.append(path)
+            targets.append(labels.index(name))
+    if not paths:
+        raise ValueError(f"Tidak ada gambar validasi di {folder}")
+
+    target_by_path = dict(zip(paths, targets))
+    input_buffer = make_input_buffer(batch_size)
+    rows = []
+    row_targets = []
+    for batch in iter_batches(paths, batch_size, workers):
+        valid = [(path, array) for path, array, _, _ in batch if array is not None]
+        if not valid:
+            continue
+        rows.append(np.array(predict_batch(input_buffer.from_images([array for _, array in valid]))))
+        row_targets.extend(target_by_path[path] for path, _ in valid)
+    return np.concatenate(rows), np.array(row_targets)
+
+def calibrate_main(args):
+    import inference
+
+    inference.configure_backend(args.backend, args.model)
+    labels = inference.active_model().labels
+    current = PostProcessor.from_config(labels, args.output)
+    probabilities, targets = predict_validation_folder(args.folder, labels, args.batch_size, args.workers)
+    temperature = fit_temperature(probabilities, targets)
+    calibrated = apply_temperature(probabilities, temperature)
+    accuracy = float(np.mean(probabilities.argmax(axis=1) == targets))
+
+    config = current.to_config()
+    config["temperature"] = round(temperature, 4)
+    if args.default_threshold is not None:
+        config["default_threshold"] = args.default_threshold
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    print(f"{len(targets)} gambar validasi, akurasi {accuracy:.2%}")
+    print(f"Temperature: {temperature:.4f}")
+    print(
+        f"NLL {negative_log_likelihood(probabilities, targets, 1.0):.4f} -> "
+        f"{negative_log_likelihood(probabilities, targets, temperature):.4f}, "
+        f"ECE {expected_calibration_error(probabilities, targets):.4f} -> "
+        f"{expected_calibration_error(calibrated, targets):.4f}"
+    )
+    print(f"Konfigurasi disimpan di {args.output}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Alat konfigurasi post-processing prediksi.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate = subparsers.add_parser("calibrate", help="Hitung temperature dari folder validasi (subfolder per label)")
+    calibrate.add_argument("folder", help="Folder validasi, misalnya validasi/Chitato/*.jpg")
+    calibrate.add_argument("--output", "-o", default="postprocessing.json", help="File konfigurasi yang ditulis (threshold yang ada dipertahankan)")
+    calibrate.add_argument("--default-threshold", type=float, help="Threshold default untuk menolak produk tidak dikenal")
+    calibrate.add_argument("--batch-size", type=int, default=32, help="Jumlah gambar per pemanggilan predict")
+    calibrate.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Jumlah thread untuk decode")
+    calibrate.add_argument("--backend", choices=["keras", "savedmodel", "tflite"], help="Backend inferensi")
+    calibrate.add_argument("--model", help="Path model (.h5, folder SavedModel, atau .tflite)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    return calibrate_main(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
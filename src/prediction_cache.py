@@ -0,0 +1,175 @@
+"""Cache prediksi berbasis isi gambar.
+
+Kunci cache adalah hash BLAKE2 dari piksel hasil decode (beserta bentuk array dan
+penanda tambahan seperti crop) digabung sidik jari model. Sidik jari dihitung satu
+kali saat model dimuat (inference.ActiveModel.fingerprint) dan diberikan lewat
+set_model, sehingga entri selalu milik model yang benar-benar ada di memori walau
+file model di disk berubah. Saat model diganti, semua entri lama terbuang.
+
+Dua tingkat penyimpanan:
+- memori: LRU (OrderedDict) dengan jumlah entri maksimum
+- disk (opsional): SQLite dengan batas ukuran total; entri yang paling lama tidak
+  diakses dihapus lebih dulu, dan entri milik model lain dihapus saat dibuka
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Fungsi untuk menghitung sidik jari file atau folder model (SavedModel)
+def model_fingerprint(path):
+    digest = hashlib.blake2b(digest_size=16)
+    if os.path.isdir(path):
+        files = sorted(os.path.join(d, f) for d, _, names in os.walk(path) for f in names)
+    else:
+        files = [path]
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+# Fungsi untuk menghitung hash isi gambar hasil decode (array uint8)
+def image_digest(image, tag=""):
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.shape}|{image.dtype}|{tag}".encode("utf-8"))
+    digest.update(memoryview(image).cast("B"))
+    return digest.hexdigest()
+
+class PredictionCache:
+    # fingerprint boleh None bila model belum dimuat; cache tidak aktif sampai set_model dipanggil
+    def __init__(self, fingerprint=None, max_entries=1024, disk_path=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = fingerprint
+        self._db = None
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path):
+        self._db = sqlite3.connect(disk_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS predictions_last_access ON predictions (last_access)")
+        self._purge_other_models()
+
+    def _purge_other_models(self):
+        if self._db is None or self._fingerprint is None:
+            return
+        deleted = self._db.execute("DELETE FROM predictions WHERE model != ?", (self._fingerprint,)).rowcount
+        self._db.commit()
+        if deleted:
+            logging.info(f"Cache prediksi: {deleted} entri dari model lama dihapus")
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+
+    # Ganti sidik jari model yang dimuat (saat startup atau setelah model registry mengganti versi)
+    def set_model(self, fingerprint):
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            if self._fingerprint is not None:
+                logging.info("Cache prediksi: model berganti, cache dikosongkan")
+            self._fingerprint = fingerprint
+            self._memory.clear()
+            self._purge_other_models()
+
+    def key(self, image, tag=""):
+        return image_digest(image, tag)
+
+    # fingerprint: sidik jari model milik pemanggil; bila bukan model cache saat ini, dianggap miss
+    def get(self, key, fingerprint=None):
+        with self._lock:
+            if self._fingerprint is None or fingerprint not in (None, self._fingerprint):
+                return None
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM predictions WHERE key = ? AND model = ?", (key, self._fingerprint)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE predictions SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    value = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    # Prediksi dari model yang sudah diganti (fingerprint berbeda) tidak disimpan
+    def put(self, key, predictions, fingerprint=None):
+        value = np.array(predictions, dtype=np.float32)
+        with self._lock:
+            if self._fingerprint is None or fingerprint not in (None, self._fingerprint):
+                return
+            self._remember(key, value)
+            if self._db is not None:
+                blob = value.tobytes()
+                # Kunci yang sama bisa ditulis dua kali (gambar kembar dalam satu batch, miss bersamaan);
+                # ukuran baris lama dikurangkan agar _disk_bytes tidak terus membengkak
+                previous = self._db.execute("SELECT size FROM predictions WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, model, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, self._fingerprint, blob, len(blob), time.time()),
+                )
+                self._disk_bytes += len(blob) - (previous[0] if previous is not None else 0)
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # Hapus entri disk yang paling lama tidak diakses sampai ukuran turun ke 90% batas
+    def _evict_disk(self):
+        target = int(self.disk_max_bytes * 0.9)
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM predictions ORDER BY last_access"):
+            if self._disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self._disk_bytes -= size
+        self._db.executemany("DELETE FROM predictions WHERE key = ?", evicted)
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,67 @@
+"""Pre-processing gambar langsung di buffer NumPy/cv2 untuk jalur file, kamera, dan batch.
+
+Langkah resize (cv2), pembalikan kanal BGR->RGB, dan normalisasi /255 digabung:
+resize menulis ke buffer uint8 yang sudah dialokasikan, lalu satu operasi
+np.multiply membaca view kanal terbalik dan menulis float32 langsung ke tensor
+input yang dipakai ulang. Tidak ada konversi ke PIL dan tidak ada array float64.
+
+Tensor yang dikembalikan InputBuffer adalah view dari buffer internal dan akan
+ditimpa pada pemanggilan berikutnya; gunakan segera (mis. langsung ke predict)
+atau salin bila perlu disimpan.
+"""
+import numpy as np
+
+INPUT_SIZE = (224, 224)  # (lebar, tinggi) input MobileNet
+
+_SCALE = np.float32(1.0 / 255.0)
+
+# Fungsi untuk memastikan gambar memiliki 3 kanal (grayscale/RGBA ikut didukung)
+def _as_three_channels(image):
+    import cv2
+
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return np.ascontiguousarray(image[:, :, :3])
+    return image
+
+# Fungsi untuk resize ke ukuran input model (urutan kanal tidak diubah); out dipakai sebagai buffer tujuan
+def resize_to_input(image, out=None):
+    import cv2
+
+    image = _as_three_channels(image)
+    if image.shape[1] == INPUT_SIZE[0] and image.shape[0] == INPUT_SIZE[1]:
+        return image  # Sudah berukuran input, tidak perlu disalin
+    if out is None:
+        return cv2.resize(image, INPUT_SIZE, interpolation=cv2.INTER_LINEAR)
+    return cv2.resize(image, INPUT_SIZE, dst=out, interpolation=cv2.INTER_LINEAR)
+
+class InputBuffer:
+    def __init__(self, max_batch=1, normalize=True):
+        self.max_batch = max_batch
+        self.normalize = normalize
+        self._tensor = np.empty((max_batch, INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.float32)
+        self._resized = np.empty((max_batch, INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.uint8)
+
+    def _write(self, index, resized, bgr):
+        source = resized[:, :, ::-1] if bgr else resized
+        if self.normalize:
+            np.multiply(source, _SCALE, out=self._tensor[index])
+        else:
+            # Normalisasi dilakukan di dalam graph model; cukup cast ke float32
+            self._tensor[index] = source
+
+    # Fungsi untuk satu gambar (RGB atau BGR, ukuran bebas) -> tensor (1, 224, 224, 3)
+    def from_image(self, image, bgr=False):
+        resized = resize_to_input(image, out=self._resized[0])
+        self._write(0, resized, bgr)
+        return self._tensor[:1]
+
+    # Fungsi untuk banyak gambar -> tensor (N, 224, 224, 3) tanpa np.stack
+    def from_images(self, images, bgr=False):
+        if len(images) > self.max_batch:
+            raise ValueError(f"Jumlah gambar {len(images)} melebihi kapasitas buffer {self.max_batch}")
+        for index, image in enumerate(images):
+            resized = resize_to_input(image, out=self._resized[index])
+            self._write(index, resized, bgr)
+        return self._tensor[:len(images)]
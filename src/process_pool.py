@@ -0,0 +1,267 @@
+"""Pool proses inferensi untuk server CPU.
+
+Setiap proses worker memuat model dan detektor MediaPipe sendiri satu kali, dengan
+jumlah thread TensorFlow/TFLite/OpenCV dibatasi per worker agar total thread
+tidak melebihi jumlah core. Gambar dikirim lewat slot shared memory
+(multiprocessing.shared_memory), sehingga yang melewati antrian hanya nomor slot
+dan bentuk array, bukan array yang di-pickle. Hasil (box dan baris prediksi) kecil
+sehingga dikirim balik lewat antrian biasa.
+
+Pemakaian:
+    pool = InferencePool(workers=6, threads_per_worker=2).start()
+    pool.wait_ready()
+    boxes, predictions, seconds = pool.submit(frame_bgr, crop=True).result()
+    pool.close()
+
+Proses worker dibuat dengan metode "spawn" (fork tidak aman untuk TensorFlow),
+jadi modul yang membuat pool harus memakai penjaga `if __name__ == "__main__"`.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Ukuran satu slot shared memory; cukup untuk frame BGR 1920x1080
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+# Variabel lingkungan jumlah thread library numerik (OpenMP/OpenBLAS/MKL) di proses worker
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# Fungsi untuk memperkecil gambar (rasio tetap) agar muat di satu slot; mengembalikan (gambar, skala)
+def fit_to_slot(image, slot_bytes):
+    import cv2
+
+    if image.nbytes <= slot_bytes:
+        return image, 1.0
+    h, w = image.shape[:2]
+    scale = (slot_bytes / image.nbytes) ** 0.5
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    image = np.ascontiguousarray(cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+    if image.nbytes > slot_bytes:
+        raise ValueError(f"Gambar {image.shape} melebihi ukuran slot ({slot_bytes} byte)")
+    return image, size[0] / w
+
+# View ke shared memory hanya hidup di dalam fungsi ini, sehingga sudah dilepas saat slot dipakai ulang
+def _process(inference, slot, shape, crop):
+    image = np.ndarray(shape, dtype=np.uint8, buffer=slot.buf)
+    if crop:
+        regions = inference.detect_and_crop_products(image)
+    else:
+        regions = [(image, (0, 0, shape[1], shape[0]))]
+    predictions = np.array(inference.classify_crops([region for region, _ in regions]), dtype=np.float32)
+    return [tuple(int(v) for v in box) for _, box in regions], predictions
+
+def _worker_main(worker_id, slot_names, tasks, results, config):
+    threads = config["threads"]
+    logging.basicConfig(level=config["log_level"], format=f"%(asctime)s - %(levelname)s - [worker {worker_id}] %(message)s")
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    try:
+        import cv2
+
+        cv2.setNumThreads(1)
+        import inference
+
+        inference.configure_backend(config["backend"], config["model"], config["normalize_in_graph"], threads)
+        timings = inference.load_all()
+    except Exception as e:
+        logging.error(f"Worker gagal memuat model: {e}", exc_info=True)
+        results.put(("failed", worker_id, str(e)))
+        for slot in slots:
+            slot.close()
+        return
+    results.put(("ready", worker_id, (timings, inference.active_model().fingerprint)))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, slot, shape, crop = task
+            start = time.perf_counter()
+            try:
+                boxes, predictions = _process(inference, slots[slot], shape, crop)
+                results.put(("done", task_id, (boxes, predictions, time.perf_counter() - start)))
+            except Exception as e:
+                logging.error(f"Error saat memproses tugas {task_id}: {e}", exc_info=True)
+                results.put(("error", task_id, f"{type(e).__name__}: {e}"))
+    finally:
+        for slot in slots:
+            slot.close()
+
+class InferencePool:
+    def __init__(self, workers=None, threads_per_worker=1, slots_per_worker=2, slot_bytes=DEFAULT_SLOT_BYTES,
+                 backend=None, model=None, normalize_in_graph=None):
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.workers = workers or max(1, (os.cpu_count() or 2) // self.threads_per_worker)
+        self.slot_bytes = slot_bytes
+        self.slot_count = self.workers * max(1, slots_per_worker)
+        self._config = {
+            "backend": backend,
+            "model": model,
+            "normalize_in_graph": normalize_in_graph,
+            "threads": self.threads_per_worker,
+            "log_level": logging.getLogger().getEffectiveLevel(),
+        }
+        self._slots = []
+        self._free_slots = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._processes = []
+        self._ready_event = threading.Event()
+        self._ready_workers = 0
+        self._failure = None
+        self._closing = False
+        self.startup_timings = {}
+        self.fingerprint = None  # Sidik jari model yang dimuat worker (kunci cache prediksi di proses utama)
+        self.completed = 0
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self._slots = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(self.slot_count)]
+        for index in range(self.slot_count):
+            self._free_slots.put(index)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        slot_names = [slot.name for slot in self._slots]
+        # Batas thread harus sudah ada di environment saat proses dibuat: proses spawn meng-import
+        # numpy (dan OpenBLAS) ketika membaca target, sebelum _worker_main sempat berjalan
+        saved_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+        os.environ.update({var: str(self.threads_per_worker) for var in THREAD_ENV_VARS})
+        try:
+            for worker_id in range(self.workers):
+                process = context.Process(
+                    target=_worker_main,
+                    args=(worker_id, slot_names, self._tasks, self._results, self._config),
+                    name=f"inference-worker-{worker_id}",
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append(process)
+        finally:
+            for var, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+        self._collector = threading.Thread(target=self._collect, name="inference-pool-results", daemon=True)
+        self._collector.start()
+        logging.info(
+            f"Pool inferensi: {self.workers} worker x {self.threads_per_worker} thread, "
+            f"{self.slot_count} slot shared memory @ {self.slot_bytes / 2**20:.1f} MB"
+        )
+        return self
+
+    @property
+    def ready(self):
+        return self._ready_event.is_set() and self._failure is None
+
+    # Tunggu sampai semua worker selesai memuat model; error bila ada worker yang gagal
+    def wait_ready(self, timeout=None):
+        if not self._ready_event.wait(timeout):
+            raise TimeoutError("Worker inferensi belum siap")
+        if self._failure is not None:
+            raise RuntimeError(f"Worker inferensi gagal dimuat: {self._failure}")
+
+    # Kirim satu gambar BGR uint8; menunggu slot kosong bila semua slot sedang dipakai.
+    # Gambar yang lebih besar dari slot diperkecil dulu; box di hasil tetap dalam koordinat gambar asli.
+    # Hasil Future: (daftar box kiri-ke-kanan, prediksi (jumlah box, jumlah kelas), detik di worker)
+    def submit(self, image, crop=True, timeout=None):
+        if self._failure is not None:
+            raise RuntimeError(f"Pool inferensi tidak dapat dipakai: {self._failure}")
+        image, scale = fit_to_slot(np.ascontiguousarray(image, dtype=np.uint8), self.slot_bytes)
+        slot = self._free_slots.get(timeout=timeout)
+        view = np.ndarray(image.shape, dtype=np.uint8, buffer=self._slots[slot].buf)
+        view[...] = image
+        del view
+        task_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[task_id] = (future, slot, scale)
+        self._tasks.put((task_id, slot, image.shape, crop))
+        return future
+
+    def map(self, images, crop=True):
+        futures = [self.submit(image, crop) for image in images]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        while True:
+            try:
+                kind, ident, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if kind == "stop":
+                break
+            if kind == "ready":
+                self.startup_timings[ident], self.fingerprint = payload
+                self._ready_workers += 1
+                if self._ready_workers == self.workers:
+                    logging.info("Semua worker inferensi siap")
+                    self._ready_event.set()
+            elif kind == "failed":
+                self._failure = payload
+                self._ready_event.set()
+            else:
+                with self._lock:
+                    entry = self._pending.pop(ident, None)
+                if entry is None:
+                    continue  # Sudah digagalkan oleh _fail_pending
+                future, slot, scale = entry
+                self._free_slots.put(slot)
+                self.completed += 1
+                if kind == "done":
+                    if scale != 1.0:
+                        boxes, predictions, seconds = payload
+                        boxes = [tuple(int(round(v / scale)) for v in box) for box in boxes]
+                        payload = (boxes, predictions, seconds)
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+
+    # Worker yang mati (mis. kehabisan memori) membuat tugas yang sedang dikerjakannya tidak pernah selesai
+    def _check_workers(self):
+        if self._closing or self._failure is not None:
+            return
+        dead = [process for process in self._processes if not process.is_alive()]
+        if not dead:
+            return
+        self._failure = f"{dead[0].name} berhenti dengan kode {dead[0].exitcode}"
+        logging.error(f"Pool inferensi: {self._failure}")
+        self._ready_event.set()
+        self._fail_pending(RuntimeError(self._failure))
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self, timeout=5.0):
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._processes:
+            self._results.put(("stop", None, None))
+            self._collector.join(timeout)
+        self._fail_pending(RuntimeError("Pool inferensi ditutup"))
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
+        self._processes = []
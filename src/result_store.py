@@ -0,0 +1,212 @@
+"""Penyimpanan riwayat hasil pengenalan di SQLite (mode WAL).
+
+Setiap hasil disimpan sebagai satu baris: waktu, sumber (file/camera/live/stream/
+server/batch), label teratas (atau produk tidak dikenal), confidence, top-k dalam
+JSON, box crop, dan latensi. add() hanya memasukkan record ke antrian; thread
+penulis menyimpan record per batch dalam satu transaksi, sehingga inferensi tidak
+pernah menunggu disk. Bila antrian penuh, record dibuang dan dihitung.
+
+Selain tabel results (diindeks per label+waktu dan per waktu), jumlah per jam
+diakumulasi di tabel hourly_counts dalam transaksi yang sama, sehingga query
+jumlah per produk per jam tetap cepat walau results berisi jutaan baris.
+
+Contoh CLI:
+    python src/result_store.py hasil_pengenalan.db counts --since 2026-10-01 --label Chitato
+    python src/result_store.py hasil_pengenalan.db recent --limit 20
+"""
+import argparse
+import csv
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import metrics
+
+RESULT_STORE_ENV = "PRODUCT_DETECTION_RESULT_STORE"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    "id INTEGER PRIMARY KEY, timestamp REAL NOT NULL, source TEXT NOT NULL, "
+    "label TEXT NOT NULL, confidence REAL NOT NULL, known INTEGER NOT NULL, top_k TEXT NOT NULL, "
+    "box_x_min INTEGER, box_y_min INTEGER, box_x_max INTEGER, box_y_max INTEGER, latency_ms REAL)",
+    "CREATE INDEX IF NOT EXISTS results_label_time ON results (label, timestamp)",
+    "CREATE INDEX IF NOT EXISTS results_time ON results (timestamp)",
+    "CREATE TABLE IF NOT EXISTS hourly_counts ("
+    "hour INTEGER NOT NULL, label TEXT NOT NULL, source TEXT NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (hour, label, source)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS hourly_counts_label ON hourly_counts (label, hour)",
+)
+
+def _connect(path):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    # Dengan WAL, synchronous=NORMAL tetap aman dari korupsi dan jauh lebih cepat
+    db.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        db.execute(statement)
+    db.commit()
+    return db
+
+class ResultStore:
+    def __init__(self, path, batch_size=256, flush_interval=1.0, max_pending=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._db = _connect(path)
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="result-store", daemon=True)
+        self._thread.start()
+
+    # Simpan satu hasil post-processing (postprocessing.Ranking); tidak pernah memblokir
+    def add(self, source, ranking, box=None, latency=None, timestamp=None):
+        box = tuple(int(v) for v in box) if box is not None else (None, None, None, None)
+        record = (
+            timestamp or time.time(),
+            source,
+            ranking.label,
+            float(ranking.confidence),
+            int(ranking.known),
+            json.dumps([(name, round(conf, 6)) for name, conf in ranking.top_k]),
+            *box,
+            latency * 1000.0 if latency is not None else None,
+        )
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.increment("result_store_dropped")
+
+    def add_many(self, source, rankings, boxes=None, latency=None, timestamp=None):
+        timestamp = timestamp or time.time()
+        for ranking, box in zip(rankings, boxes or [None] * len(rankings)):
+            self.add(source, ranking, box, latency, timestamp)
+
+    def _write(self, records):
+        hourly = Counter((int(record[0] // 3600), record[2], record[1]) for record in records)
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO results (timestamp, source, label, confidence, known, top_k, "
+                "box_x_min, box_y_min, box_x_max, box_y_max, latency_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            self._db.executemany(
+                "INSERT INTO hourly_counts (hour, label, source, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (hour, label, source) DO UPDATE SET count = count + excluded.count",
+                [(*key, count) for key, count in hourly.items()],
+            )
+        self.written += len(records)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            records = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(records) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                records.append(record)
+            if not records:
+                continue
+            try:
+                with metrics.timer("result_store_write"):
+                    self._write(records)
+            except sqlite3.Error as e:
+                logging.error(f"Gagal menyimpan {len(records)} hasil pengenalan: {e}")
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._db.close()
+
+# === Query ===
+def counts_per_hour(db, since=None, until=None, label=None, source=None):
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append("hour >= ?")
+        params.append(int(since // 3600))
+    if until is not None:
+        conditions.append("hour < ?")
+        params.append(int(-(-until // 3600)))
+    if label:
+        conditions.append("label = ?")
+        params.append(label)
+    if source:
+        conditions.append("source = ?")
+        params.append(source)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = db.execute(
+        f"SELECT hour, label, SUM(count) FROM hourly_counts {where} GROUP BY hour, label ORDER BY hour, label",
+        params,
+    )
+    return [(hour * 3600, name, count) for hour, name, count in rows]
+
+def recent_results(db, limit=20, label=None):
+    if label:
+        rows = db.execute(
+            "SELECT timestamp, source, label, confidence, top_k, latency_ms FROM results "
+            "WHERE label = ? ORDER BY timestamp DESC LIMIT ?",
+            (label, limit),
+        )
+    else:
+        rows = db.execute(
+            "SELECT timestamp, source, label, confidence, top_k, latency_ms FROM results ORDER BY timestamp DESC LIMIT ?",
+            (limit,),
+        )
+    return rows.fetchall()
+
+def _parse_time(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query riwayat hasil pengenalan produk.")
+    parser.add_argument("database", help="File SQLite hasil pengenalan")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    counts = subparsers.add_parser("counts", help="Jumlah per produk per jam")
+    counts.add_argument("--since", help="Waktu awal (ISO, mis. 2026-10-01 atau 2026-10-01T08:00)")
+    counts.add_argument("--until", help="Waktu akhir (ISO)")
+    counts.add_argument("--label", help="Hanya produk ini")
+    counts.add_argument("--source", help="Hanya sumber ini (file, camera, live, stream, server, batch)")
+    counts.add_argument("--format", choices=["table", "csv"], default="table", help="Format keluaran")
+    recent = subparsers.add_parser("recent", help="Hasil terbaru")
+    recent.add_argument("--limit", type=int, default=20, help="Jumlah baris")
+    recent.add_argument("--label", help="Hanya produk ini")
+    args = parser.parse_args(argv)
+
+    db = sqlite3.connect(f"file:{args.database}?mode=ro", uri=True)
+    try:
+        if args.command == "counts":
+            rows = counts_per_hour(db, _parse_time(args.since), _parse_time(args.until), args.label, args.source)
+            if args.format == "csv":
+                writer = csv.writer(sys.stdout)
+                writer.writerow(["hour", "label", "count"])
+                writer.writerows((_format_time(hour), name, count) for hour, name, count in rows)
+            else:
+                for hour, name, count in rows:
+                    print(f"{_format_time(hour)}  {name:<20} {count}")
+        else:
+            for timestamp, source, name, confidence, top_k, latency_ms in recent_results(db, args.limit, args.label):
+                latency = f"{latency_ms:.1f} ms" if latency_ms is not None else "-"
+                print(f"{_format_time(timestamp)}  {source:<8} {name:<20} {confidence * 100:6.2f}%  {latency}  {top_k}")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Layanan HTTP lokal untuk klasifikasi produk dengan micro-batching dinamis.
+
+Contoh:
+    python src/server.py --port 8080 --max-batch 16 --max-wait-ms 5
+
+Endpoint:
+    POST /predict   body: file gambar (multipart field "image" atau raw bytes)
+                    query: top_k (default 3), crop=1 untuk crop area tangan dulu
+    GET  /healthz   proses hidup
+    GET  /readyz    200 bila model dan detektor tangan sudah dimuat, 503 bila belum
+    GET  /metrics   histogram latensi per tahap dalam format teks Prometheus
+
+Permintaan yang datang bersamaan digabung oleh DynamicBatcher menjadi satu
+pemanggilan predict, sampai --max-batch gambar atau --max-wait-ms berlalu.
+
+Dengan --workers N, crop dan prediksi dijalankan di N proses worker (lihat
+process_pool.py), masing-masing dengan --threads-per-worker thread inferensi.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from aiohttp import web
+
+import inference
+import metrics
+
+class DynamicBatcher:
+    def __init__(self, max_batch=16, max_wait_ms=5.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = asyncio.Queue()
+        # Model dipanggil dari satu thread saja; buffer input dipakai ulang antar batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self._input_buffer = inference.make_input_buffer(max_batch)
+        self._task = None
+        self.batches = 0
+        self.images = 0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    # Fungsi untuk mengantrikan satu gambar BGR 224x224 uint8; mengembalikan (baris prediksi, snapshot model)
+    async def predict(self, image):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    def _predict_batch(self, images):
+        # Snapshot model per batch: bila model diganti, batch ini tetap memakai label/post-processing model lamanya
+        model = inference.active_model()
+        return inference.predict_batch(self._input_buffer.from_images(images, bgr=True), model), model
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Ambil juga yang sudah menunggu di antrian tanpa perlu menunggu lagi
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            items = [(image, future) for image, future in items if not future.cancelled()]
+            if not items:
+                continue
+            try:
+                predictions, model = await loop.run_in_executor(self._executor, self._predict_batch, [image for image, _ in items])
+            except Exception as e:
+                logging.error(f"Error saat prediksi batch: {e}", exc_info=True)
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.images += len(items)
+            for (_, future), row in zip(items, predictions):
+                if not future.done():
+                    future.set_result((np.array(row), model))
+
+# Fungsi decode dan resize gambar, dijalankan di thread pool
+def decode_image(data):
+    import cv2
+
+    array = np.frombuffer(data, dtype=np.uint8)
+    image = cv2.imdecode(array, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Data bukan gambar yang valid")
+    return image
+
+def prepare_input(image):
+    from preprocessing import resize_to_input
+
+    return resize_to_input(image)
+
+# Isi respons dari hasil post-processing bersama: label (atau produk tidak dikenal) dan top-k terkalibrasi
+def ranking_response(ranking):
+    return {
+        "label": ranking.label,
+        "known": ranking.known,
+        "products": [{"label": name, "confidence": round(conf, 6)} for name, conf in ranking.top_k],
+    }
+
+async def read_image_bytes(request):
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "image":
+                return await part.read(decode=False)
+        raise web.HTTPBadRequest(text="Field 'image' tidak ditemukan")
+    return await request.read()
+
+def is_ready(app):
+    pool = app["pool"]
+    return pool.ready if pool is not None else inference.is_loaded()
+
+async def handle_predict(request):
+    app = request.app
+    if not is_ready(app):
+        raise web.HTTPServiceUnavailable(text="Model belum siap")
+    try:
+        top_k = int(request.query.get("top_k", 3))
+    except ValueError:
+        raise web.HTTPBadRequest(text="top_k harus berupa angka")
+    crop = request.query.get("crop", "0") in ("1", "true", "yes")
+
+    start = time.perf_counter()
+    data = await read_image_bytes(request)
+    loop = asyncio.get_running_loop()
+    try:
+        image = await loop.run_in_executor(app["decode_executor"], decode_image, data)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    if app["pool"] is not None:
+        # Model dimuat di proses worker; proses ini hanya memakai label dan post-processing bawaan
+        fingerprint, postprocessor = app["pool"].fingerprint, inference.postprocessor
+    else:
+        model = inference.active_model()
+        fingerprint, postprocessor = model.fingerprint, model.postprocessor
+    cache = inference.prediction_cache
+    key = None
+    if cache is not None:
+        # Hash gambar, lookup SQLite, dan commit tidak dijalankan di event loop
+        key = await loop.run_in_executor(app["decode_executor"], cache.key, image, f"crop={crop}")
+        cached = await loop.run_in_executor(app["decode_executor"], cache.get, key, fingerprint)
+        if cached is not None:
+            ranking = postprocessor.process_one(cached, top_k)
+            latency = time.perf_counter() - start
+            if app["store"] is not None:
+                app["store"].add("server", ranking, latency=latency)
+            return web.json_response({
+                **ranking_response(ranking),
+                "latency_ms": round(latency * 1000.0, 3),
+                "cached": True,
+            })
+    box = None
+    if app["pool"] is not None:
+        # submit bisa menunggu slot shared memory kosong, jadi jangan dijalankan di event loop
+        try:
+            future = await loop.run_in_executor(app["decode_executor"], app["pool"].submit, image, crop)
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        boxes, rows, _ = await asyncio.wrap_future(future)
+        box, predictions = boxes[0], rows[0]  # Region paling kiri, sama seperti detect_and_crop_product
+    else:
+        if crop:
+            # MediaPipe tidak aman dipakai bersamaan dari banyak thread; gunakan satu thread khusus
+            image = await loop.run_in_executor(app["hands_executor"], inference.detect_and_crop_product, image)
+        input_image = await loop.run_in_executor(app["decode_executor"], prepare_input, image)
+        predictions, model = await app["batcher"].predict(input_image)
+        postprocessor, fingerprint = model.postprocessor, model.fingerprint
+    if key is not None:
+        await loop.run_in_executor(app["decode_executor"], cache.put, key, predictions, fingerprint)
+    ranking = postprocessor.process_one(predictions, top_k)
+    latency = time.perf_counter() - start
+    metrics.observe("request", latency)
+    if app["store"] is not None:
+        app["store"].add("server", ranking, box, latency)
+
+    return web.json_response({
+        **ranking_response(ranking),
+        "latency_ms": round(latency * 1000.0, 3),
+    })
+
+async def handle_healthz(request):
+    return web.json_response({"status": "ok"})
+
+async def handle_readyz(request):
+    if is_ready(request.app):
+        pool = request.app["pool"]
+        if pool is not None:
+            status = {"status": "ready", "workers": pool.workers, "images": pool.completed}
+        else:
+            batcher = request.app["batcher"]
+            status = {"status": "ready", "batches": batcher.batches, "images": batcher.images}
+        if inference.prediction_cache is not None:
+            status["cache"] = inference.prediction_cache.stats()
+        if inference.model_registry is not None:
+            status["models"] = inference.model_registry.status()
+        return web.json_response(status)
+    if request.app["load_status"]["error"] is not None:
+        return web.json_response({"status": "failed", "error": request.app["load_status"]["error"]}, status=503)
+    return web.json_response({"status": "loading"}, status=503)
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.registry.prometheus_text(), content_type="text/plain")
+
+# Dipanggil saat pemuatan model di latar belakang selesai; kegagalan dicatat dan dilaporkan di /readyz
+def _loading_done(app, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        app["load_status"]["error"] = f"{type(error).__name__}: {error}"
+        logging.error(f"Gagal memuat model: {error}", exc_info=error)
+        return
+    # Dengan pool, model hanya dimuat di worker, jadi sidik jari cache diambil dari worker
+    if app["pool"] is not None and inference.prediction_cache is not None:
+        inference.prediction_cache.set_model(app["pool"].fingerprint)
+
+async def on_startup(app):
+    # Muat model di latar belakang agar /healthz langsung bisa menjawab
+    if app["pool"] is not None:
+        app["pool"].start()
+        loop = asyncio.get_running_loop()
+        app["loading"] = loop.run_in_executor(None, app["pool"].wait_ready)
+    else:
+        app["batcher"].start()
+        loop = asyncio.get_running_loop()
+        app["loading"] = loop.run_in_executor(app["hands_executor"], inference.load_all, (1, app["batcher"].max_batch))
+    app["loading"].add_done_callback(lambda future: _loading_done(app, future))
+
+async def on_cleanup(app):
+    if app["pool"] is not None:
+        await asyncio.get_running_loop().run_in_executor(None, app["pool"].close)
+    await app["batcher"].stop()
+    app["decode_executor"].shutdown(wait=False)
+    app["hands_executor"].shutdown(wait=False)
+    if app["store"] is not None:
+        app["store"].close()
+
+def create_app(max_batch=16, max_wait_ms=5.0, decode_workers=4, pool=None, store=None):
+    app = web.Application(client_max_size=20 * 1024 * 1024)
+    app["pool"] = pool
+    app["store"] = store
+    app["load_status"] = {"error": None}  # Diubah setelah startup, jadi disimpan dalam dict yang bisa diubah
+    app["batcher"] = DynamicBatcher(max_batch, max_wait_ms)
+    app["decode_executor"] = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="decode")
+    app["hands_executor"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hands")
+    app.router.add_post("/predict", handle_predict)
+    app.router.add_get("/healthz", handle_healthz)
+    app.router.add_get("/readyz", handle_readyz)
+    app.router.add_get("/metrics", handle_metrics)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan HTTP lokal untuk klasifikasi produk.")
+    parser.add_argument("--host", default="127.0.0.1", help="Alamat yang didengarkan")
+    parser.add_argument("--port", type=int, default=8080, help="Port HTTP")
+    parser.add_argument("--max-batch", type=int, default=16, help="Jumlah gambar maksimum per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Waktu tunggu maksimum untuk mengisi batch")
+    parser.add_argument("--decode-workers", type=int, default=4, help="Jumlah thread untuk decode gambar")
+    parser.add_argument("--backend", choices=["keras", "savedmodel", "tflite"], help="Backend inferensi")
+    parser.add_argument("--model", help="Path model (.h5, folder SavedModel, atau .tflite)")
+    parser.add_argument("--cache-size", type=int, default=4096, help="Jumlah entri cache prediksi di memori (0 = nonaktif)")
+    parser.add_argument("--cache", help="File SQLite untuk cache prediksi di disk")
+    parser.add_argument("--cache-max-mb", type=int, default=256, help="Ukuran maksimum cache disk dalam MB")
+    parser.add_argument("--workers", type=int, default=0, help="Jumlah proses worker inferensi (0 = satu proses dengan DynamicBatcher)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="Thread TensorFlow/TFLite per proses worker")
+    parser.add_argument("--manifest", help="Manifest model (lihat model_registry.py); versi aktif dapat diganti tanpa restart")
+    parser.add_argument("--store", help="File SQLite untuk riwayat hasil pengenalan (lihat result_store.py)")
+    args = parser.parse_args(argv)
+
+    if args.manifest and args.workers > 0:
+        parser.error("--manifest belum didukung bersama --workers")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    inference.configure_backend(args.backend, args.model)
+    if args.manifest:
+        inference.enable_model_registry(args.manifest)
+    if args.cache_size > 0 or args.cache:
+        inference.enable_prediction_cache(max(args.cache_size, 1), args.cache, args.cache_max_mb * 1024 * 1024)
+    pool = None
+    if args.workers > 0:
+        from process_pool import InferencePool
+
+        pool = InferencePool(args.workers, args.threads_per_worker, backend=args.backend, model=args.model)
+    store = None
+    if args.store:
+        from result_store import ResultStore
+
+        store = ResultStore(args.store)
+    app = create_app(args.max_batch, args.max_wait_ms, args.decode_workers, pool, store)
+    web.run_app(app, host=args.host, port=args.port)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
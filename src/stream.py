@@ -0,0 +1,272 @@
+"""Pemrosesan video rekaman atau stream (file, URL RTSP/HTTP, indeks kamera) tanpa GUI.
+
+Frame dibaca oleh thread decode ke antrian prefetch terbatas. Frame yang tidak
+diambil sampelnya hanya di-grab (tanpa decode penuh). Setiap frame sampel melewati
+pipeline yang sama dengan mode kamera: crop setiap tangan, lalu klasifikasi.
+Crop dari beberapa frame digabung dalam satu pemanggilan predict. Hasil
+diagregasi per segmen waktu dan ditulis bertahap ke JSONL begitu segmen selesai.
+
+Contoh:
+    python src/stream.py rekaman_kasir.mp4 --sample-fps 2 --segment-seconds 10 --output hasil.jsonl
+    python src/stream.py rtsp://10.0.0.5/stream1 --every 15 --output hasil.jsonl
+"""
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+_END = object()
+
+class FrameStream:
+    def __init__(self, source, every=None, sample_fps=None, prefetch=8):
+        import cv2
+
+        self.source = int(source) if isinstance(source, str) and source.isdigit() else source
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise IOError(f"Sumber video tidak bisa dibuka: {source}")
+        reported = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = reported if 1 <= reported <= 240 else None
+        # Jumlah frame total hanya diketahui untuk file; stream langsung bernilai 0/-1
+        count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count = count if count > 0 else None
+        if every:
+            self.every = max(1, every)
+        elif sample_fps and self.fps:
+            self.every = max(1, round(self.fps / sample_fps))
+        else:
+            self.every = 1
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._decode, name="stream-decode", daemon=True)
+
+    def _put(self, item):
+        # put dengan timeout agar thread bisa berhenti walau konsumen sudah selesai
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self):
+        index = -1
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                index += 1
+                if index % self.every:
+                    # Lewati frame tanpa decode penuh
+                    if not self.cap.grab():
+                        break
+                    continue
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                timestamp = index / self.fps if self.fps else time.perf_counter() - start
+                if not self._put((index, timestamp, frame)):
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            self.cap.release()
+            self._put(_END)
+
+    # Generator (indeks frame, detik sejak awal, frame BGR) untuk setiap frame sampel
+    def __iter__(self):
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self._stop.set()
+
+class SegmentAggregator:
+    def __init__(self, source, segment_seconds, writer, store=None):
+        self.source = str(source)
+        self.segment_seconds = segment_seconds
+        self.writer = writer
+        self.store = store
+        self._segment = None
+        self.segments_written = 0
+
+    def _new_segment(self, index):
+        return {
+            "index": index,
+            "frames": 0,
+            "regions": 0,
+            "counts": defaultdict(int),
+            "confidence_sum": defaultdict(float),
+            "confidence_max": defaultdict(float),
+            "max_products_in_frame": defaultdict(int),
+        }
+
+    # Tambahkan hasil satu frame: baris prediksi dan box untuk setiap region di frame tersebut.
+    # postprocessor harus milik model yang menghasilkan prediksi (snapshot inference.active_model()).
+    def add(self, timestamp, predictions, boxes, postprocessor=None):
+        if postprocessor is None:
+            import inference
+
+            postprocessor = inference.postprocessor
+        segment_index = int(timestamp // self.segment_seconds)
+        if self._segment is not None and segment_index != self._segment["index"]:
+            self.flush()
+        if self._segment is None:
+            self._segment = self._new_segment(segment_index)
+        segment = self._segment
+        segment["frames"] += 1
+        in_frame = defaultdict(int)
+        # Region dengan produk tidak dikenal tidak dihitung
+        rankings = postprocessor.process(predictions) if len(predictions) else []
+        if self.store is not None:
+            self.store.add_many("stream", rankings, boxes)
+        for ranking in rankings:
+            if not ranking.known:
+                continue
+            label, confidence = ranking.label, ranking.confidence
+            segment["regions"] += 1
+            segment["counts"][label] += 1
+            segment["confidence_sum"][label] += confidence
+            segment["confidence_max"][label] = max(segment["confidence_max"][label], confidence)
+            in_frame[label] += 1
+        for label, count in in_frame.items():
+            segment["max_products_in_frame"][label] = max(segment["max_products_in_frame"][label], count)
+
+    def flush(self):
+        segment = self._segment
+        if segment is None:
+            return
+        self._segment = None
+        products = [
+            {
+                "label": label,
+                "detections": count,
+                "frame_ratio": round(count / segment["frames"], 4),
+                "mean_confidence": round(segment["confidence_sum"][label] / count, 6),
+                "max_confidence": round(segment["confidence_max"][label], 6),
+                "max_in_frame": segment["max_products_in_frame"][label],
+            }
+            for label, count in sorted(segment["counts"].items(), key=lambda item: item[1], reverse=True)
+        ]
+        self.writer.write(json.dumps({
+            "source": self.source,
+            "segment": segment["index"],
+            "start_seconds": segment["index"] * self.segment_seconds,
+            "end_seconds": (segment["index"] + 1) * self.segment_seconds,
+            "frames": segment["frames"],
+            "regions": segment["regions"],
+            "products": products,
+        }) + "\n")
+        self.writer.flush()
+        self.segments_written += 1
+
+# Fungsi untuk memproses satu sumber; crop dari beberapa frame digabung hingga batch_size per predict.
+# Dengan tracker, deteksi tangan penuh hanya dijalankan pada keyframe (lihat tracking.py).
+def process_stream(stream, aggregator, batch_size=16, tracker=None):
+    from inference import active_model, classify_crops, detect_and_crop_products
+
+    pending = []  # (timestamp, box setiap region)
+    crops = []
+    frames = 0
+
+    def run_batch():
+        # Snapshot model agar label/post-processing tetap cocok walau model diganti di tengah jalan
+        model = active_model()
+        predictions = classify_crops(crops, model) if crops else np.empty((0, 0))
+        offset = 0
+        for timestamp, boxes in pending:
+            aggregator.add(timestamp, predictions[offset:offset + len(boxes)], boxes, model.postprocessor)
+            offset += len(boxes)
+        pending.clear()
+        crops.clear()
+
+    for _, timestamp, frame in stream:
+        regions = tracker.regions(frame) if tracker is not None else detect_and_crop_products(frame)
+        if len(crops) + len(regions) > batch_size and crops:
+            run_batch()
+        pending.append((timestamp, [box for _, box in regions]))
+        crops.extend(crop for crop, _ in regions)
+        frames += 1
+    run_batch()
+    aggregator.flush()
+    return frames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proses video rekaman atau stream melalui pipeline crop tangan + klasifikasi.")
+    parser.add_argument("sources", nargs="+", help="File video, URL yang bisa dibuka OpenCV, atau indeks kamera")
+    parser.add_argument("--output", "-o", required=True, help="File JSONL hasil per segmen")
+    parser.add_argument("--every", type=int, help="Ambil setiap frame ke-N")
+    parser.add_argument("--sample-fps", type=float, default=2.0, help="Jumlah frame sampel per detik video (bila --every tidak diberikan)")
+    parser.add_argument("--segment-seconds", type=float, default=10.0, help="Panjang segmen agregasi dalam detik")
+    parser.add_argument("--prefetch", type=int, default=8, help="Ukuran antrian frame hasil decode")
+    parser.add_argument("--batch-size", type=int, default=16, help="Jumlah crop maksimum per pemanggilan predict")
+    parser.add_argument("--keyframe-interval", type=int, default=0, help="Lacak box tangan antar frame sampel dan deteksi penuh setiap N frame (0 = deteksi setiap frame)")
+    parser.add_argument("--store", help="File SQLite untuk riwayat hasil per region (lihat result_store.py)")
+    parser.add_argument("--backend", choices=["keras", "savedmodel", "tflite"], help="Backend inferensi")
+    parser.add_argument("--model", help="Path model (.h5, folder SavedModel, atau .tflite)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    import inference
+
+    inference.configure_backend(args.backend, args.model)
+    inference.load_all((1, args.batch_size))
+
+    store = None
+    if args.store:
+        from result_store import ResultStore
+
+        store = ResultStore(args.store)
+
+    failed = 0
+    with open(args.output, "a", encoding="utf-8") as f:
+        for source in args.sources:
+            try:
+                stream = FrameStream(source, args.every, args.sample_fps, args.prefetch)
+            except IOError as e:
+                logging.error(str(e))
+                failed += 1
+                continue
+            aggregator = SegmentAggregator(source, args.segment_seconds, f, store)
+            start = time.perf_counter()
+            try:
+                tracker = None
+                if args.keyframe_interval > 0:
+                    from tracking import RoiTracker
+
+                    tracker = RoiTracker(args.keyframe_interval)
+                frames = process_stream(stream, aggregator, args.batch_size, tracker)
+            except Exception as e:
+                logging.error(f"Error saat memproses {source}: {e}", exc_info=True)
+                failed += 1
+                continue
+            elapsed = time.perf_counter() - start
+            message = f"{source}: {frames} frame sampel, {aggregator.segments_written} segmen dalam {elapsed:.1f} detik"
+            if stream.fps and stream.frame_count:
+                video_seconds = stream.frame_count / stream.fps
+                message += f" ({video_seconds / elapsed:.1f}x real-time)" if elapsed > 0 else ""
+            logging.info(message)
+            print(message)
+    if store is not None:
+        store.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
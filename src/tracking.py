@@ -0,0 +1,128 @@
+"""Pelacakan area tangan (ROI) agar MediaPipe tidak dijalankan pada setiap frame.
+
+Deteksi tangan penuh hanya dijalankan pada keyframe: setiap `keyframe_interval`
+frame, saat pelacakan gagal, atau saat confidence klasifikasi turun. Di antara
+keyframe, setiap box digeser mengikuti optical flow Lucas-Kanade (median
+perpindahan titik fitur di dalam box) pada frame abu-abu yang diperkecil. Crop
+diambil dari box hasil pelacakan, sehingga posisinya stabil antar frame.
+
+Selama tidak ada tangan yang dilacak, deteksi dijalankan setiap frame agar
+tangan yang baru masuk langsung terdeteksi (sama seperti tanpa pelacakan).
+
+Satu RoiTracker hanya untuk satu urutan frame dan satu thread (MediaPipe tidak
+aman dipakai bersamaan).
+"""
+import numpy as np
+
+import inference
+import metrics
+
+# Sisi terpanjang frame abu-abu untuk optical flow
+TRACKING_MAX_SIDE = 320
+
+class RoiTracker:
+    def __init__(self, keyframe_interval=10, min_confidence=0.5, min_tracked_ratio=0.5, max_points=30):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.min_confidence = min_confidence
+        self.min_tracked_ratio = min_tracked_ratio
+        self.max_points = max_points
+        self._boxes = []  # Box (x_min, y_min, x_max, y_max) di koordinat frame penuh
+        self._points = []  # Titik fitur per box, koordinat frame kecil, bentuk (n, 1, 2)
+        self._prev_gray = None
+        self._since_keyframe = 0
+        self._force_keyframe = True
+        self.keyframes = 0
+        self.tracked_frames = 0
+
+    # Paksa deteksi penuh pada frame berikutnya (mis. kamera berganti atau mode live dimulai ulang)
+    def reset(self):
+        self._force_keyframe = True
+
+    # Laporkan confidence klasifikasi setiap region; confidence rendah memicu deteksi ulang
+    def report_confidence(self, confidences):
+        if len(confidences) and float(np.min(confidences)) < self.min_confidence:
+            self._force_keyframe = True
+
+    def _gray(self, image):
+        import cv2
+
+        h, w = image.shape[:2]
+        scale = min(1.0, TRACKING_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), scale
+
+    def _seed_points(self, gray, scale):
+        import cv2
+
+        points = []
+        for x_min, y_min, x_max, y_max in self._boxes:
+            mask = np.zeros_like(gray)
+            mask[int(y_min * scale):int(y_max * scale), int(x_min * scale):int(x_max * scale)] = 255
+            found = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+            points.append(found if found is not None else np.empty((0, 1, 2), dtype=np.float32))
+        return points
+
+    def _keyframe(self, image, gray, scale):
+        h, w = image.shape[:2]
+        boxes = [inference.landmarks_to_box(landmarks, w, h) for landmarks in inference.detect_hand_landmarks(image)]
+        boxes = [box for box in boxes if box[2] > box[0] and box[3] > box[1]]
+        self._boxes = inference.merge_overlapping_boxes(boxes)
+        self._points = self._seed_points(gray, scale)
+        self._since_keyframe = 0
+        self._force_keyframe = False
+        self.keyframes += 1
+        metrics.increment("hand_keyframes")
+
+    # Geser setiap box mengikuti optical flow; False bila ada box yang kehilangan terlalu banyak titik
+    def _track(self, gray, scale, width, height):
+        import cv2
+
+        boxes = []
+        points = []
+        for (x_min, y_min, x_max, y_max), previous in zip(self._boxes, self._points):
+            if len(previous) < 3:
+                return False
+            current, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, previous, None, winSize=(15, 15), maxLevel=2)
+            good = status.ravel() == 1
+            if good.sum() < max(3, self.min_tracked_ratio * len(previous)):
+                return False
+            dx, dy = np.median(current[good] - previous[good], axis=0).ravel() / scale
+            box_w, box_h = x_max - x_min, y_max - y_min
+            x_min = int(min(max(0, x_min + round(dx)), width - box_w))
+            y_min = int(min(max(0, y_min + round(dy)), height - box_h))
+            boxes.append((x_min, y_min, x_min + box_w, y_min + box_h))
+            points.append(current[good].reshape(-1, 1, 2))
+        self._boxes = boxes
+        self._points = points
+        return True
+
+    # Pengganti detect_and_crop_products untuk frame berurutan; format hasil sama: [(crop, box)]
+    @metrics.timed("track_and_crop_product")
+    def regions(self, image):
+        h, w = image.shape[:2]
+        gray, scale = self._gray(image)
+        keyframe = (
+            self._force_keyframe
+            or not self._boxes
+            or self._prev_gray is None
+            or self._prev_gray.shape != gray.shape
+            or self._since_keyframe + 1 >= self.keyframe_interval
+        )
+        if not keyframe:
+            self._since_keyframe += 1
+            if self._track(gray, scale, w, h):
+                self.tracked_frames += 1
+            else:
+                keyframe = True
+        if keyframe:
+            self._keyframe(image, gray, scale)
+        self._prev_gray = gray
+
+        # Jika tidak ada tangan terdeteksi, kembalikan gambar utuh
+        if not self._boxes:
+            return [(image, (0, 0, w, h))]
+        return [
+            (image[y_min:y_max, x_min:x_max], (x_min, y_min, x_max, y_max))
+            for x_min, y_min, x_max, y_max in sorted(self._boxes)
+        ]
@@ -0,0 +1,104 @@
+"""Worker inferensi di luar thread utama Tk.
+
+Pekerjaan berat (deteksi tangan, pre-processing, model.predict) dijalankan di satu
+thread worker yang diisi lewat antrian terbatas. Hasilnya dikumpulkan di antrian
+hasil dan callback dipanggil di thread Tk melalui root.after, sehingga antarmuka
+tetap responsif selama inferensi berjalan.
+"""
+import logging
+import queue
+import threading
+
+# Interval polling hasil di thread Tk (~60 fps)
+POLL_INTERVAL_MS = 16
+
+class InferenceRequest:
+    def __init__(self, func, args, on_done, on_error):
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+class InferenceWorker:
+    def __init__(self, root, max_pending=4):
+        self.root = root
+        self._requests = queue.Queue(maxsize=max_pending)
+        self._results = queue.Queue()
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+        self._thread.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    # Fungsi untuk mengirim pekerjaan ke worker; raise queue.Full bila antrian penuh
+    def submit(self, func, *args, on_done=None, on_error=None):
+        request = InferenceRequest(func, args, on_done, on_error)
+        with self._active_lock:
+            self._active.add(request)
+        try:
+            self._requests.put_nowait(request)
+        except queue.Full:
+            with self._active_lock:
+                self._active.discard(request)
+            raise
+        return request
+
+    # Fungsi untuk membatalkan semua pekerjaan yang belum selesai (mis. saat kembali ke Home)
+    def cancel_all(self):
+        with self._active_lock:
+            for request in self._active:
+                request.cancel()
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request.cancelled:
+                self._finish(request)
+                continue
+            try:
+                result = request.func(*request.args)
+                self._results.put((request, result, None))
+            except Exception as e:
+                logging.error(f"Error di worker inferensi: {e}", exc_info=True)
+                self._results.put((request, None, e))
+
+    def _finish(self, request):
+        with self._active_lock:
+            self._active.discard(request)
+
+    # Callback yang error tidak boleh menghentikan polling; on_done yang gagal diteruskan ke on_error
+    def _dispatch(self, request, result, error):
+        if error is None and request.on_done:
+            try:
+                request.on_done(result)
+                return
+            except Exception as e:
+                logging.error(f"Error di callback hasil inferensi: {e}", exc_info=True)
+                error = e
+        if error is not None and request.on_error:
+            try:
+                request.on_error(error)
+            except Exception as e:
+                logging.error(f"Error di callback error inferensi: {e}", exc_info=True)
+
+    # Dipanggil di thread Tk: jalankan callback untuk hasil yang sudah selesai
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    request, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._finish(request)
+                if not request.cancelled:
+                    self._dispatch(request, result, error)
+        finally:
+            self.root.after(POLL_INTERVAL_MS, self._poll)